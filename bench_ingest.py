@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Ingestion throughput benchmark against local mocks.
+
+Starts mock_nasdaq_api.py in-process and serves daily bars from the
+offline market data provider, then runs each ingest mode in a fresh
+process and reports symbols/sec, p50/p99 per-symbol latency and peak RSS:
+
+    python bench_ingest.py --symbols 2000 --latency 0.02 --workers 16
+    python bench_ingest.py --only summary --error-rate 0.05 --json
+
+OHLC fixtures are <SYMBOL>.csv files (as written by
+yf.Ticker(symbol).history(...).to_csv()) in --fixtures; symbols without
+one get deterministic synthetic bars.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import queue
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import mock_nasdaq_api
+from market_data import OfflineProvider, set_provider
+
+SUMMARY_MODES = ["sequential", "threaded", "async"]
+OHLC_MODES = ["sequential", "threaded"]
+
+
+def _timed(fn, latencies):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+    return wrapper
+
+
+def _time_round_trips(session, latencies):
+    """Record each response's send-to-headers time (requests' resp.elapsed), not time spent in the limiter."""
+    get = session.get
+
+    def timed_get(*args, **kwargs):
+        resp = get(*args, **kwargs)
+        latencies.append(resp.elapsed.total_seconds())
+        return resp
+    session.get = timed_get
+
+
+def _round_trip_trace(latencies):
+    """aiohttp trace recording request start to response headers, minus any wait for a pooled connection."""
+    import aiohttp
+
+    trace = aiohttp.TraceConfig()
+
+    async def on_start(session, ctx, params):
+        ctx.started, ctx.queued = time.perf_counter(), 0.0
+
+    async def on_queued_start(session, ctx, params):
+        ctx.queued_at = time.perf_counter()
+
+    async def on_queued_end(session, ctx, params):
+        ctx.queued += time.perf_counter() - ctx.queued_at
+
+    async def on_end(session, ctx, params):
+        latencies.append(time.perf_counter() - ctx.started - ctx.queued)
+
+    trace.on_request_start.append(on_start)
+    trace.on_connection_queued_start.append(on_queued_start)
+    trace.on_connection_queued_end.append(on_queued_end)
+    trace.on_request_end.append(on_end)
+    return trace
+
+
+def run_mode(kind: str, mode: str, options: dict, base_url: str, results):
+    """Run one benchmark in a fresh process so peak RSS is per mode."""
+    workdir = tempfile.mkdtemp(prefix="bench_ingest_")
+    os.environ["SUMMARY_STORE"] = os.path.join(workdir, "summary.db")
+    os.environ["SUMMARY_CACHE_FILE"] = os.path.join(workdir, "cache.db")
+    os.environ["OHLC_DEBUG_LOG_FILE"] = os.path.join(workdir, "ohlc_api_debug.log")
+    sys.stdout = open(os.devnull, "w")  # per-symbol progress output is not what we measure
+
+    import stock
+    import fetch_ohlc_yfinance
+
+    stock.NASDAQ_API_BASE = base_url
+    symbols = [f"S{i:05d}" for i in range(options["symbols"])]
+    workers = options["workers"]
+    latencies = []
+
+    start = time.perf_counter()
+    if kind == "summary":
+        # Per-symbol latency is the HTTP round trip only, so the modes compare
+        if mode == "async":
+            import aiohttp
+
+            trace = _round_trip_trace(latencies)
+            session_class = aiohttp.ClientSession
+            aiohttp.ClientSession = lambda *a, **kw: session_class(*a, trace_configs=[trace], **kw)
+            rows = asyncio.run(stock.fetch_summaries_async(symbols, concurrency=workers, use_cache=False))
+        else:
+            _time_round_trips(stock.get_session(), latencies)
+            rows = stock.fetch_all(symbols, workers=1 if mode == "sequential" else workers, rate=1e9, use_cache=False)
+        ok = len(rows)
+    else:
+        set_provider(OfflineProvider(options["fixtures"], options["ohlc_latency"]))
+        fetch = _timed(fetch_ohlc_yfinance.fetch_ohlc_yfinance, latencies)
+        if mode == "sequential":
+            ohlc = [fetch(s) for s in symbols]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                ohlc = list(pool.map(fetch, symbols))
+        ok = sum(1 for o in ohlc if o)
+    elapsed = time.perf_counter() - start
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    lat_ms = np.array(latencies) * 1000 if latencies else np.array([np.nan])
+    results.put({
+        "kind": kind,
+        "mode": mode,
+        "symbols": len(symbols),
+        "ok": ok,
+        "seconds": round(elapsed, 3),
+        "symbols_per_sec": round(len(symbols) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(float(np.percentile(lat_ms, 50)), 2),
+        "p99_ms": round(float(np.percentile(lat_ms, 99)), 2),
+        "peak_rss_mb": round(peak_mb, 1),
+    })
+
+
+def _wait_for_report(proc, results, timeout: float):
+    """The child's report, or None if it died (or ran past `timeout` seconds and was killed) without one."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return results.get(timeout=1.0)
+        except queue.Empty:
+            pass
+        if proc.exitcode is not None:
+            # It may have exited right after putting the report
+            try:
+                return results.get(timeout=1.0)
+            except queue.Empty:
+                return None
+        if time.monotonic() > deadline:
+            proc.kill()
+            proc.join()
+            return None
+
+
+def main(options: dict):
+    server, base_url = mock_nasdaq_api.start_server(
+        latency=options["latency"], error_rate=options["error_rate"], payload_size=options["payload_size"]
+    )
+    ctx = multiprocessing.get_context("spawn")
+    plan = []
+    if options["only"] in (None, "summary"):
+        plan += [("summary", m) for m in SUMMARY_MODES]
+    if options["only"] in (None, "ohlc"):
+        plan += [("ohlc", m) for m in OHLC_MODES]
+
+    reports = []
+    try:
+        for kind, mode in plan:
+            results = ctx.Queue()
+            proc = ctx.Process(target=run_mode, args=(kind, mode, options, base_url, results))
+            proc.start()
+            report = _wait_for_report(proc, results, options["timeout"])
+            proc.join()
+            if report is None:
+                print(f"{kind:8} {mode:10} failed: benchmark process exited with code {proc.exitcode}")
+                continue
+            reports.append(report)
+            if options["json"]:
+                print(json.dumps(report))
+            else:
+                print(f"{kind:8} {mode:10} {report['ok']:>6}/{report['symbols']:<6} {report['seconds']:>8.2f}s "
+                      f"{report['symbols_per_sec']:>9.1f} sym/s  p50 {report['p50_ms']:>8.2f} ms  "
+                      f"p99 {report['p99_ms']:>8.2f} ms  peak RSS {report['peak_rss_mb']:>7.1f} MB")
+    finally:
+        server.shutdown()
+    return reports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark summary and OHLC ingestion against local mocks")
+    parser.add_argument("--symbols", type=int, default=500, help="Number of synthetic symbols (default: 500)")
+    parser.add_argument("--workers", type=int, default=16, help="Workers / connections for threaded and async modes (default: 16)")
+    parser.add_argument("--latency", type=float, default=0.02, help="Mock Nasdaq latency per request in seconds (default: 0.02)")
+    parser.add_argument("--error-rate", type=float, default=0.0, dest="error_rate", help="Fraction of mock Nasdaq requests answered with 429 (default: 0)")
+    parser.add_argument("--payload-size", type=int, default=0, dest="payload_size", help="Approximate summaryData size in bytes (default: natural size)")
+    parser.add_argument("--ohlc-latency", type=float, default=0.05, dest="ohlc_latency", help="Offline provider latency per bars request in seconds (default: 0.05)")
+    parser.add_argument("--fixtures", default=None, help="Directory of <SYMBOL>.csv history fixtures (default: synthetic bars)")
+    parser.add_argument("--only", choices=["summary", "ohlc"], default=None, help="Run only one benchmark group")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Seconds before a mode's process is killed (default: 600)")
+    parser.add_argument("--json", action="store_true", help="Print one JSON object per mode instead of a table")
+    args = parser.parse_args()
+    main(vars(args))
@@ -0,0 +1,135 @@
+"""
+Server-Sent Events for the web viewer.
+
+Sources are cheap change checks (a file mtime, the store version, a log
+size) registered by name. While at least one client is subscribed, a
+watcher thread runs every check each EVENTS_POLL seconds and publishes a
+source's payload when it reports a change; with no subscribers the thread
+exits, so an idle server does no work. Each subscriber gets its own queue
+and only the event names it asked for.
+
+A subscriber can also pass per-connection handlers: handler(payload)
+turns a shared change notice into that client's own payload (None skips
+it), and handler(None) runs once when the stream opens so the client can
+catch up. A payload with an "id" key is sent as the SSE event id, which
+browsers send back as Last-Event-ID when they reconnect.
+
+    bus.add_source("recommendations", check)  # check() -> payload or None
+    return Response(bus.stream(bus.subscribe(["recommendations"])), mimetype="text/event-stream")
+"""
+import json
+import os
+import queue
+import threading
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+EVENTS_POLL = float(os.environ.get("EVENTS_POLL", "0.25"))
+# Seconds between keep-alive comments on a quiet stream (lets us notice closed clients)
+EVENTS_HEARTBEAT = float(os.environ.get("EVENTS_HEARTBEAT", "15"))
+# Events buffered per client before a slow one starts missing them
+EVENTS_BACKLOG = 256
+
+
+class Subscription:
+    def __init__(self, names: Optional[Iterable[str]], handlers: Dict[str, Callable[[Optional[Dict]], Optional[Dict]]] = None):
+        self.names = set(names) if names else None
+        self.handlers = handlers or {}
+        self.queue = queue.Queue(maxsize=EVENTS_BACKLOG)
+
+    def wants(self, name: str) -> bool:
+        return self.names is None or name in self.names
+
+
+class EventBus:
+    """Change sources polled only while someone listens, fanned out to per-client queues."""
+
+    def __init__(self, poll: float = EVENTS_POLL, heartbeat: float = EVENTS_HEARTBEAT):
+        self.poll = poll
+        self.heartbeat = heartbeat
+        self._sources: Dict[str, Callable[[], Optional[Dict]]] = {}
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def add_source(self, name: str, check: Callable[[], Optional[Dict]]):
+        """`check()` returns the event payload when its source changed since the last call, else None."""
+        self._sources[name] = check
+
+    def subscribe(self, names: Iterable[str] = None, handlers: Dict[str, Callable] = None) -> Subscription:
+        sub = Subscription(names, handlers)
+        with self._lock:
+            self._subscribers.add(sub)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._watch, name="event-watcher", daemon=True)
+                self._thread.start()
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def publish(self, name: str, payload: Dict):
+        with self._lock:
+            subscribers = [s for s in self._subscribers if s.wants(name)]
+        for sub in subscribers:
+            try:
+                sub.queue.put_nowait((name, payload))
+            except queue.Full:
+                pass
+
+    def wake(self):
+        """Run the checks now instead of at the next poll (after an in-process change)."""
+        self._wake.set()
+
+    def _check(self, publish: bool):
+        for name, check in list(self._sources.items()):
+            try:
+                payload = check()
+            except Exception as e:
+                print(f"Event source {name} failed: {e}")
+                continue
+            if payload is not None and publish:
+                self.publish(name, payload)
+
+    def _watch(self):
+        # The first pass only records the current state; clients already rendered it
+        self._check(publish=False)
+        while True:
+            self._wake.wait(self.poll)
+            self._wake.clear()
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            self._check(publish=True)
+
+    @staticmethod
+    def _format(name: str, payload: Dict) -> str:
+        event_id = f"id: {payload['id']}\n" if "id" in payload else ""
+        return f"{event_id}event: {name}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+    def stream(self, sub: Subscription) -> Iterator[str]:
+        """SSE body for one client; unsubscribes when the client goes away."""
+        try:
+            yield "retry: 2000\n\n"
+            for name, handler in sub.handlers.items():
+                payload = handler(None)
+                if payload is not None:
+                    yield self._format(name, payload)
+            while True:
+                try:
+                    name, payload = sub.queue.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if name in sub.handlers:
+                    payload = sub.handlers[name](payload)
+                    if payload is None:
+                        continue
+                yield self._format(name, payload)
+        finally:
+            self.unsubscribe(sub)
+
+
+bus = EventBus()
@@ -0,0 +1,93 @@
+"""
+Buffered, structured debug log for data fetchers.
+
+Each event is one compact JSON line (symbol, rows, latency_ms, outcome,
+error, ...). Records are buffered in memory and written in batches to a
+file that rotates by size, or by time when OHLC_DEBUG_ROTATE_WHEN is set
+(e.g. "midnight"). Failures flush the buffer immediately.
+
+OHLC_DEBUG_LOG selects the mode:
+    off      nothing is logged
+    sampled  every failure, plus OHLC_DEBUG_SAMPLE of successful events (default)
+    full     every event
+"""
+import json
+import logging
+import logging.handlers
+import os
+import random
+import threading
+import time
+
+LOG_MODE = os.environ.get("OHLC_DEBUG_LOG", "sampled").lower()
+LOG_FILE = os.environ.get(
+    "OHLC_DEBUG_LOG_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "ohlc_api_debug.log")
+)
+SAMPLE_RATE = float(os.environ.get("OHLC_DEBUG_SAMPLE", "0.05"))
+MAX_BYTES = int(os.environ.get("OHLC_DEBUG_LOG_BYTES", str(5 * 1024 * 1024)))
+BACKUP_COUNT = int(os.environ.get("OHLC_DEBUG_LOG_BACKUPS", "3"))
+ROTATE_WHEN = os.environ.get("OHLC_DEBUG_ROTATE_WHEN")
+BUFFER_RECORDS = 200
+
+# Outcomes that are always written in sampled mode
+FAILURES = {"error", "no_data", "store_error"}
+
+
+class JsonLineFormatter(logging.Formatter):
+    """One JSON object per line: ts, event and the record's `fields`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {"ts": round(record.created, 3), "event": record.getMessage()}
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, separators=(",", ":"), default=str)
+
+
+_logger = None
+_logger_lock = threading.Lock()
+
+
+def get_fetch_logger() -> logging.Logger:
+    """Return the process-wide fetch logger, creating its handlers on first use."""
+    global _logger
+    if _logger is None:
+        with _logger_lock:
+            if _logger is None:
+                logger = logging.getLogger("fetch_debug")
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                if ROTATE_WHEN:
+                    target = logging.handlers.TimedRotatingFileHandler(
+                        LOG_FILE, when=ROTATE_WHEN, backupCount=BACKUP_COUNT, delay=True
+                    )
+                else:
+                    target = logging.handlers.RotatingFileHandler(
+                        LOG_FILE, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, delay=True
+                    )
+                target.setFormatter(JsonLineFormatter())
+                # logging.shutdown() at exit flushes what is still buffered
+                logger.addHandler(logging.handlers.MemoryHandler(
+                    BUFFER_RECORDS, flushLevel=logging.WARNING, target=target, flushOnClose=True
+                ))
+                _logger = logger
+    return _logger
+
+
+def log_event(event: str, outcome: str, **fields):
+    """Record one fetch event, subject to the configured mode."""
+    if LOG_MODE == "off":
+        return
+    failed = outcome in FAILURES
+    if LOG_MODE != "full" and not failed and random.random() >= SAMPLE_RATE:
+        return
+    fields["outcome"] = outcome
+    get_fetch_logger().log(logging.WARNING if failed else logging.INFO, event, extra={"fields": fields})
+
+
+def flush():
+    for handler in get_fetch_logger().handlers:
+        handler.flush()
+
+
+def elapsed_ms(start: float) -> float:
+    """Milliseconds since a time.perf_counter() start."""
+    return round((time.perf_counter() - start) * 1000, 2)
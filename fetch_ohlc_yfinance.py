@@ -1,73 +1,199 @@
-import yfinance as yf
-from typing import Optional, Dict
+import os
+import threading
+import time
+from datetime import date, timedelta
+from typing import Optional, Dict, List, Tuple
+from fetch_log import elapsed_ms, log_event
+from market_data import get_provider
+from singleflight import single_flight
+from summary_store import get_writer
+from trading_calendar import current_session, exchange_now, is_session_closed
 
-def fetch_ohlc_yfinance(symbol: str, update_db: bool = True) -> Optional[Dict[str, float]]:
+# Seconds a quote for the session still in progress stays fresh
+LIVE_QUOTE_TTL = float(os.environ.get("OHLC_LIVE_TTL", "60"))
+
+
+class QuoteCache:
     """
-    Fetch today's and previous day's OHLC data for a given symbol using yfinance.
-    If update_db is True, update nasdaq_summary.csv with the fetched data.
-    Returns a dict with keys: Today High, Today Low, Today Open, Today Close, Previous High, Previous Low, Previous Open, Previous Close, Date
+    In-memory OHLC quotes keyed by (symbol, session date).
+
+    A quote for a closed session never changes, so it is kept until a newer
+    session starts; the live session's quote expires after `live_ttl`
+    seconds. Lookups on weekends and holidays map to the last session and
+    are served from the cache.
     """
-    import pandas as pd
-    import os
+
+    def __init__(self, live_ttl: float = LIVE_QUOTE_TTL):
+        self.live_ttl = live_ttl
+        self._quotes: Dict[Tuple[str, date], Tuple[Dict, Optional[float]]] = {}
+        self._session: Optional[date] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _roll(self, session: date):
+        # Quotes from older sessions can no longer be asked for
+        if session != self._session:
+            self._quotes = {k: v for k, v in self._quotes.items() if k[1] >= session}
+            self._session = session
+
+    def get(self, symbol: str, session: date) -> Optional[Dict]:
+        with self._lock:
+            self._roll(session)
+            entry = self._quotes.get((symbol, session))
+            if entry is not None and (entry[1] is None or time.monotonic() < entry[1]):
+                self.hits += 1
+                return dict(entry[0])
+            self.misses += 1
+            return None
+
+    def put(self, symbol: str, session: date, ohlc: Dict, now=None):
+        """Keep closed-session quotes for good; anything else (live or lagging data) gets the live TTL."""
+        final = ohlc.get("Date") == session and is_session_closed(session, now)
+        with self._lock:
+            self._roll(session)
+            self._quotes[(symbol, session)] = (dict(ohlc), None if final else time.monotonic() + self.live_ttl)
+
+    def clear(self):
+        with self._lock:
+            self._quotes.clear()
+
+
+quote_cache = QuoteCache()
+
+
+def session_window(session: date) -> Tuple[date, date]:
+    """[start, end) bar range that holds `session` and at least the session before it."""
+    return session - timedelta(days=10), session + timedelta(days=1)
+
+
+def ohlc_from_history(hist) -> Dict:
+    """
+    Reduce a daily history frame (at least 2 rows) to the Today/Previous OHLC fields:
+    float prices and the session date. Formatting is left to the templates and CSV export.
+    """
+    today = hist.iloc[-1]
+    prev = hist.iloc[-2]
+    return {
+        'Today High': float(today['High']),
+        'Today Low': float(today['Low']),
+        'Today Open': float(today['Open']),
+        'Today Close': float(today['Close']),
+        'Previous High': float(prev['High']),
+        'Previous Low': float(prev['Low']),
+        'Previous Open': float(prev['Open']),
+        'Previous Close': float(prev['Close']),
+        'Date': today.name.date()
+    }
+
+
+def ohlc_record(ohlc: Dict) -> Dict:
+    """OHLC payload -> store row fields; the values are already typed, only the date becomes ISO text."""
+    return dict(ohlc, Date=ohlc['Date'].isoformat())
+
+def fetch_ohlc_yfinance(symbol: str, update_db: bool = True, use_cache: bool = True) -> Optional[Dict]:
+    """
+    Fetch today's and previous day's OHLC data for a given symbol from the market data provider (yfinance by default).
+    If update_db is True, queue the fetched data for the summary store's writer thread.
+    With use_cache, a quote already fetched for the current session is returned without a network call
+    (it was queued for the store when it was fetched).
+    Returns a dict with float Today High, Today Low, Today Open, Today Close, Previous High, Previous Low, Previous Open,
+    Previous Close and the session Date (datetime.date)
+    """
+    started = time.perf_counter()
+    now = exchange_now()
+    session = current_session(now)
+    if use_cache:
+        cached = quote_cache.get(symbol, session)
+        if cached is not None:
+            log_event("ohlc", "cached", symbol=symbol, latency_ms=elapsed_ms(started))
+            return cached
+    # Concurrent lookups of the same symbol share one provider request
+    ohlc_data = single_flight.do(("ohlc", symbol), _fetch_quote, symbol, session, now, started)
+    if ohlc_data is None:
+        return None
+    if update_db:
+        try:
+            get_writer().upsert(symbol, ohlc_record(ohlc_data))
+        except Exception as e:
+            log_event("ohlc", "store_error", symbol=symbol, error=str(e))
+    return dict(ohlc_data)
+
+def _fetch_quote(symbol: str, session: date, now, started: float) -> Optional[Dict]:
+    """One provider request for a symbol's session quote; the result goes into the quote cache."""
     try:
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period="2d")
-        log_path = os.path.join(os.path.dirname(__file__), "ohlc_api_debug.log")
-        with open(log_path, "a") as logf:
-            logf.write(f"Symbol: {symbol}\nHistory shape: {hist.shape}\nHistory: {hist}\n")
-        if hist.shape[0] < 2:
-            with open(log_path, "a") as logf:
-                logf.write(f"Not enough data for {symbol}\n\n")
+        hist = get_provider().get_bars([symbol], *session_window(session)).get(symbol)
+        if hist is None or hist.shape[0] < 2:
+            log_event("ohlc", "no_data", symbol=symbol, rows=0 if hist is None else int(hist.shape[0]),
+                      latency_ms=elapsed_ms(started))
             return None
-        today = hist.iloc[-1]
-        prev = hist.iloc[-2]
-        def fmt(val):
-            return f"${val:,.2f}" if val is not None else ""
-        ohlc_data = {
-            'Today High': fmt(today['High']),
-            'Today Low': fmt(today['Low']),
-            'Today Open': fmt(today['Open']),
-            'Today Close': fmt(today['Close']),
-            'Previous High': fmt(prev['High']),
-            'Previous Low': fmt(prev['Low']),
-            'Previous Open': fmt(prev['Open']),
-            'Previous Close': fmt(prev['Close']),
-            'Date': str(today.name.date())
-        }
-        with open(log_path, "a") as logf:
-            logf.write(f"OHLC Data: {ohlc_data}\n\n")
-        if update_db:
-            import time
-            csv_path = os.path.join(os.path.dirname(__file__), "nasdaq_summary.csv")
-            for attempt in range(5):
-                try:
-                    if os.path.exists(csv_path):
-                        df = pd.read_csv(csv_path)
-                        if "Symbol" in df.columns and symbol in df["Symbol"].values:
-                            for k, v in ohlc_data.items():
-                                df.loc[df["Symbol"] == symbol, k] = v
-                        else:
-                            row = {"Symbol": symbol}
-                            row.update(ohlc_data)
-                            df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
-                        df.to_csv(csv_path, index=False)
-                    else:
-                        row = {"Symbol": symbol}
-                        row.update(ohlc_data)
-                        df = pd.DataFrame([row])
-                        df.to_csv(csv_path, index=False)
-                    break
-                except PermissionError as e:
-                    with open(log_path, "a") as logf:
-                        logf.write(f"PermissionError on nasdaq_summary.csv: {e}\nRetrying...\n")
-                    time.sleep(1)
-                except Exception as e:
-                    with open(log_path, "a") as logf:
-                        logf.write(f"Other error on nasdaq_summary.csv: {e}\n")
-                    break
+        ohlc_data = ohlc_from_history(hist)
+        quote_cache.put(symbol, session, ohlc_data, now)
+        log_event("ohlc", "ok", symbol=symbol, rows=int(hist.shape[0]), date=ohlc_data["Date"],
+                  latency_ms=elapsed_ms(started))
         return ohlc_data
     except Exception as e:
-        with open(log_path, "a") as logf:
-            logf.write(f"Error fetching OHLC from yfinance for {symbol}: {e}\n\n")
-        print(f"Error fetching OHLC from yfinance for {symbol}: {e}")
+        log_event("ohlc", "error", symbol=symbol, latency_ms=elapsed_ms(started), error=str(e))
+        print(f"Error fetching OHLC for {symbol}: {e}")
         return None
+
+def fetch_ohlc_batch(symbols: List[str], update_db: bool = True, chunk_size: int = 200,
+                     use_cache: bool = True) -> Dict[str, Dict]:
+    """
+    Fetch today's and previous day's OHLC for many symbols with grouped
+    provider requests (chunk_size symbols per get_bars call) instead of one
+    request per symbol. Symbols with a cached quote for the
+    current session are not downloaded again.
+    If update_db is True, all downloaded results are queued for the store writer, which commits them as one batch.
+    Returns {symbol: ohlc dict} for the symbols that had at least two bars.
+    """
+    started = time.perf_counter()
+    symbols = list(dict.fromkeys(symbols))
+    now = exchange_now()
+    session = current_session(now)
+    cached = {}
+    if use_cache:
+        for symbol in symbols:
+            quote = quote_cache.get(symbol, session)
+            if quote is not None:
+                cached[symbol] = quote
+    to_fetch = [s for s in symbols if s not in cached]
+    results = {}
+    for start in range(0, len(to_fetch), chunk_size):
+        chunk = to_fetch[start:start + chunk_size]
+        chunk_started = time.perf_counter()
+        try:
+            frames = get_provider().get_bars(chunk, *session_window(session))
+        except Exception as e:
+            log_event("ohlc_chunk", "error", first=chunk[0], last=chunk[-1], symbols=len(chunk),
+                      latency_ms=elapsed_ms(chunk_started), error=str(e))
+            continue
+        for symbol, hist in frames.items():
+            if hist.shape[0] >= 2:
+                results[symbol] = ohlc_from_history(hist)
+                quote_cache.put(symbol, session, results[symbol], now)
+        log_event("ohlc_chunk", "ok", first=chunk[0], last=chunk[-1], symbols=len(chunk),
+                  rows=sum(len(f) for f in frames.values()), latency_ms=elapsed_ms(chunk_started))
+    missing = [s for s in to_fetch if s not in results]
+    log_event("ohlc_batch", "no_data" if missing else "ok", symbols=len(symbols), downloaded=len(results),
+              cached=len(cached), missing=missing[:50], latency_ms=elapsed_ms(started))
+    if update_db and results:
+        try:
+            writer = get_writer()
+            for symbol, ohlc in results.items():
+                writer.upsert(symbol, ohlc_record(ohlc))
+        except Exception as e:
+            log_event("ohlc_batch", "store_error", symbols=len(results), error=str(e))
+    return {**cached, **results}
+
+if __name__ == "__main__":
+    import argparse
+    import pandas as pd
+    parser = argparse.ArgumentParser(description="Refresh Today/Previous OHLC for a watchlist in one batch")
+    parser.add_argument("symbols", nargs="*", help="Symbols to refresh (default: every symbol in --file)")
+    parser.add_argument("--file", default="tickers.csv", help="CSV with a Symbol column (default: tickers.csv)")
+    parser.add_argument("--chunk-size", type=int, default=200, dest="chunk_size", help="Symbols per download request (default: 200)")
+    args = parser.parse_args()
+    symbols = args.symbols or pd.read_csv(args.file)["Symbol"].tolist()
+    results = fetch_ohlc_batch(symbols, chunk_size=args.chunk_size)
+    print(f"Updated OHLC for {len(results)}/{len(symbols)} symbols")
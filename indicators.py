@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Technical indicators for every symbol in the history store at once.
+
+compute_indicators() runs pandas rolling/ewm operations over wide
+Date x Symbol matrices, so one call covers the whole universe.
+IndicatorEngine keeps the same indicators as per-symbol NumPy state
+(ring buffers for windowed values, running averages for EMA/RSI/ATR) and
+advances all symbols by one bar per update(), which is what a refresh
+needs when a new daily bar arrives.
+
+Indicators: SMA20/50, EMA12/26, RSI14 and ATR14 (Wilder smoothing),
+VWAP20 (rolling volume-weighted typical price), gap % from the previous
+close and intraday range % of the open.
+
+    python indicators.py AAPL MSFT
+    python indicators.py --days 400
+"""
+import argparse
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from ohlc_history import get_history
+
+SMA_WINDOWS = (20, 50)
+EMA_SPANS = (12, 26)
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+VWAP_WINDOW = 20
+# Calendar days of history read on a cold start; enough to warm up every indicator
+WARMUP_DAYS = 200
+
+BAR_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+INDICATOR_COLUMNS = (
+    ["Close"] + [f"SMA{w}" for w in SMA_WINDOWS] + [f"EMA{s}" for s in EMA_SPANS]
+    + [f"RSI{RSI_PERIOD}", f"ATR{ATR_PERIOD}", f"VWAP{VWAP_WINDOW}", "GapPct", "RangePct"]
+)
+_RING = max(max(SMA_WINDOWS), VWAP_WINDOW)
+
+
+def wide_bars(bars: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Long (Symbol, Date, OHLCV) bars -> one Date x Symbol frame per field."""
+    frame = bars.pivot(index="Date", columns="Symbol", values=BAR_FIELDS)
+    return {field: frame[field].astype("float64") for field in BAR_FIELDS}
+
+
+def _true_range(high, low, prev_close):
+    # High-low, widened by a gap from the previous close when there is one
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def _rsi(avg_gain, avg_loss):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+def _gains(delta):
+    """Split price changes into gains and losses, keeping NaN where there was no change to measure."""
+    gap = np.isnan(delta)
+    return np.where(gap, np.nan, np.maximum(delta, 0)), np.where(gap, np.nan, np.maximum(-delta, 0))
+
+
+def _smooth_step(avg, x, alpha):
+    """One adjust=False EMA step in place; NaN inputs are skipped, the first value seeds the average."""
+    seen = ~np.isnan(x)
+    first = seen & np.isnan(avg)
+    step = seen & ~first
+    avg[first] = x[first]
+    avg[step] = (1 - alpha) * avg[step] + alpha * x[step]
+
+
+def _rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    """Sum over the trailing `window` rows of a Date x Symbol array; NaN unless all are present."""
+    pad = np.zeros((1, x.shape[1]))
+    total = np.concatenate([pad, np.cumsum(np.nan_to_num(x), axis=0)])
+    gaps = np.concatenate([pad, np.cumsum(np.isnan(x), axis=0)])
+    out = np.full(x.shape, np.nan)
+    if len(x) >= window:
+        complete = gaps[window:] - gaps[:-window] == 0
+        out[window - 1:] = np.where(complete, total[window:] - total[:-window], np.nan)
+    return out
+
+
+def _smoothed(x: np.ndarray, alpha: float, min_periods: int) -> np.ndarray:
+    """Skip-NaN EMA down the date axis, all symbols per step; NaN until `min_periods` observations."""
+    avg = np.full(x.shape[1], np.nan)
+    count = np.zeros(x.shape[1])
+    out = np.empty(x.shape)
+    for t, row in enumerate(x):
+        _smooth_step(avg, row, alpha)
+        count += ~np.isnan(row)
+        out[t] = np.where(count >= min_periods, avg, np.nan)
+    return out
+
+
+def compute_indicators(bars: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Every indicator over the full stored history, as Date x Symbol frames.
+    A symbol without a bar on a date has NaN there; windowed indicators
+    need a full window of bars, smoothed ones skip the gap.
+    """
+    w = wide_bars(bars)
+    index, columns = w["Close"].index, w["Close"].columns
+    open_, high, low, close, volume = (w[f].to_numpy() for f in BAR_FIELDS)
+    prev_close = w["Close"].ffill().shift(1).to_numpy()
+    out = {"Close": close}
+    for window in SMA_WINDOWS:
+        out[f"SMA{window}"] = _rolling_sum(close, window) / window
+    for span in EMA_SPANS:
+        out[f"EMA{span}"] = _smoothed(close, 2 / (span + 1), span)
+    gain, loss = _gains(close - prev_close)
+    out[f"RSI{RSI_PERIOD}"] = _rsi(_smoothed(gain, 1 / RSI_PERIOD, RSI_PERIOD), _smoothed(loss, 1 / RSI_PERIOD, RSI_PERIOD))
+    out[f"ATR{ATR_PERIOD}"] = _smoothed(_true_range(high, low, prev_close), 1 / ATR_PERIOD, ATR_PERIOD)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        typical = (high + low + close) / 3
+        out[f"VWAP{VWAP_WINDOW}"] = _rolling_sum(typical * volume, VWAP_WINDOW) / _rolling_sum(volume, VWAP_WINDOW)
+        out["GapPct"] = (open_ / prev_close - 1) * 100
+        out["RangePct"] = (high - low) / open_ * 100
+    return {name: pd.DataFrame(values, index=index, columns=columns) for name, values in out.items()}
+
+
+def latest(indicators: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Last row of compute_indicators() as a Symbol x indicator frame."""
+    snap = pd.DataFrame({name: frame.iloc[-1] for name, frame in indicators.items()})
+    snap.index.name = "Symbol"
+    return snap[INDICATOR_COLUMNS]
+
+
+class IndicatorEngine:
+    """
+    Incremental indicators for many symbols. State is one NumPy array per
+    quantity with a row per symbol, so update() is a handful of vector
+    operations regardless of universe size. Updating the latest date again
+    (a provisional bar that changed) replaces it instead of advancing.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self.symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        self.last_date = None
+        self._state: Dict[str, np.ndarray] = {}
+        self._saved = None
+        self._pos = 0
+        # History symbols as of the last sync()
+        self._synced = set()
+        self._grow(0)
+
+    def _blank(self, n: int) -> Dict[str, np.ndarray]:
+        nan = lambda *shape: np.full(shape, np.nan)
+        state = {name: nan(n, _RING) for name in ("close_ring", "tpv_ring", "vol_ring")}
+        for name in ["last_close", "avg_gain", "avg_loss", "atr", "open", "high", "low", "close", "gap"]:
+            state[name] = nan(n)
+        for span in EMA_SPANS:
+            state[f"ema{span}"] = nan(n)
+        # Observations behind each smoothed value, for the warm-up cut-off
+        for name in ["n_close", "n_delta", "n_tr"]:
+            state[name] = np.zeros(n)
+        return state
+
+    def _grow(self, n: int):
+        """Add `n` blank symbol rows to the live and saved state."""
+        extra = self._blank(n)
+        for target in filter(None, (self._state, self._saved)):
+            for name, values in extra.items():
+                target[name] = np.concatenate([target[name], values]) if name in target else values
+        if not self._state:
+            self._state = extra
+
+    def _rows(self, symbols) -> np.ndarray:
+        new = [s for s in dict.fromkeys(symbols) if s not in self._index]
+        if new:
+            for symbol in new:
+                self._index[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+            self._grow(len(new))
+        return np.fromiter((self._index[s] for s in symbols), dtype=np.intp, count=len(symbols))
+
+    def update(self, day, bars: pd.DataFrame):
+        """
+        Apply one date's bars (indexed by Symbol, OHLCV columns) to every
+        symbol; symbols missing from `bars` get a gap for that date.
+        """
+        rows = self._rows(list(bars.index))
+        self._apply(pd.Timestamp(day), rows, *(bars[f].to_numpy(dtype="float64") for f in BAR_FIELDS))
+
+    def _apply(self, day, rows, *values, save: bool = True):
+        if self.last_date is not None and day < self.last_date:
+            raise ValueError(f"Bars for {day.date()} are older than the last update ({self.last_date.date()})")
+        if day == self.last_date:
+            self._state = {k: x.copy() for k, x in self._saved.items()}
+            self._pos = (self._pos - 1) % _RING
+        else:
+            # Restore point in case this date's bar is replaced later
+            self._saved = {k: x.copy() for k, x in self._state.items()} if save else None
+            self.last_date = day
+        s = self._state
+        n = len(self.symbols)
+        # Symbols without a bar for this date stay NaN
+        o, h, l, c, v = (np.full(n, np.nan) for _ in BAR_FIELDS)
+        for arr, field_values in zip((o, h, l, c, v), values):
+            arr[rows] = field_values
+
+        prev = s["last_close"]
+        delta = c - prev
+        gain, loss = _gains(delta)
+        _smooth_step(s["avg_gain"], gain, 1 / RSI_PERIOD)
+        _smooth_step(s["avg_loss"], loss, 1 / RSI_PERIOD)
+        tr = _true_range(h, l, prev)
+        _smooth_step(s["atr"], tr, 1 / ATR_PERIOD)
+        for span in EMA_SPANS:
+            _smooth_step(s[f"ema{span}"], c, 2 / (span + 1))
+        s["n_delta"] += ~np.isnan(delta)
+        s["n_tr"] += ~np.isnan(tr)
+        s["n_close"] += ~np.isnan(c)
+        s["last_close"] = np.where(np.isnan(c), prev, c)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            s["gap"] = (o / prev - 1) * 100
+        for name, arr in zip(("open", "high", "low", "close"), (o, h, l, c)):
+            s[name] = arr
+        s["close_ring"][:, self._pos] = c
+        s["tpv_ring"][:, self._pos] = (h + l + c) / 3 * v
+        s["vol_ring"][:, self._pos] = v
+        self._pos = (self._pos + 1) % _RING
+
+    def _window(self, ring: str, window: int) -> np.ndarray:
+        cols = (self._pos - window + np.arange(window)) % _RING
+        return self._state[ring][:, cols]
+
+    def snapshot(self) -> pd.DataFrame:
+        """Current indicator values as a Symbol x indicator frame."""
+        s = self._state
+        out = {"Close": s["close"]}
+        for window in SMA_WINDOWS:
+            out[f"SMA{window}"] = self._window("close_ring", window).mean(axis=1)
+        for span in EMA_SPANS:
+            out[f"EMA{span}"] = np.where(s["n_close"] >= span, s[f"ema{span}"], np.nan)
+        ready = s["n_delta"] >= RSI_PERIOD
+        out[f"RSI{RSI_PERIOD}"] = np.where(ready, _rsi(s["avg_gain"], s["avg_loss"]), np.nan)
+        out[f"ATR{ATR_PERIOD}"] = np.where(s["n_tr"] >= ATR_PERIOD, s["atr"], np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[f"VWAP{VWAP_WINDOW}"] = (self._window("tpv_ring", VWAP_WINDOW).sum(axis=1)
+                                         / self._window("vol_ring", VWAP_WINDOW).sum(axis=1))
+            out["GapPct"] = s["gap"]
+            out["RangePct"] = (s["high"] - s["low"]) / s["open"] * 100
+        return pd.DataFrame(out, index=pd.Index(self.symbols, name="Symbol"))[INDICATOR_COLUMNS]
+
+    def apply_bars(self, bars: pd.DataFrame):
+        """Apply long (Symbol, Date, OHLCV) bars date by date, from the last update onwards."""
+        if self.last_date is not None:
+            bars = bars[bars["Date"] >= self.last_date]
+        if bars.empty:
+            return
+        w = wide_bars(bars)
+        rows = self._rows(list(w["Close"].columns))
+        arrays = [w[f].to_numpy() for f in BAR_FIELDS]
+        days = w["Close"].index
+        for t, day in enumerate(days):
+            self._apply(day, rows, *(a[t] for a in arrays), save=t == len(days) - 1)
+
+    def sync(self, history) -> "IndicatorEngine":
+        """
+        Catch up with `history` (a HistoryStore), re-reading the latest date
+        in case it was provisional. A symbol added to the history since the
+        last sync needs its back history, which the incremental state cannot
+        take in, so the engine then starts over from WARMUP_DAYS.
+        """
+        symbols = set(history.symbols())
+        if self.last_date is not None and not symbols <= self._synced:
+            self._reset()
+        start = self.last_date.date() if self.last_date is not None else date.today() - timedelta(days=WARMUP_DAYS)
+        self.apply_bars(history.all_bars(start=start))
+        self._synced = symbols
+        return self
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> IndicatorEngine:
+    """Return the process-wide engine, caught up with the history store."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = IndicatorEngine()
+        return _engine.sync(get_history())
+
+
+def describe(row) -> str:
+    """Short text for one snapshot row, e.g. "Above VWAP; 20/50 SMA uptrend; RSI 58"."""
+    parts = []
+    vwap = row.get(f"VWAP{VWAP_WINDOW}")
+    if pd.notna(vwap) and pd.notna(row["Close"]):
+        parts.append("Above VWAP" if row["Close"] >= vwap else "Below VWAP")
+    fast, slow = row.get(f"SMA{SMA_WINDOWS[0]}"), row.get(f"SMA{SMA_WINDOWS[1]}")
+    if pd.notna(fast) and pd.notna(slow):
+        trend = "uptrend" if fast > slow else "downtrend"
+        parts.append(f"{SMA_WINDOWS[0]}/{SMA_WINDOWS[1]} SMA {trend}")
+    rsi = row.get(f"RSI{RSI_PERIOD}")
+    if pd.notna(rsi):
+        parts.append(f"RSI {rsi:.0f}")
+    if pd.notna(row.get("RangePct")):
+        parts.append(f"range {row['RangePct']:.1f}%")
+    return "; ".join(parts)
+
+
+def prompt_context(snapshot: pd.DataFrame, limit: int = 10) -> str:
+    """One line per symbol for the assistant prompt, most volatile sessions first."""
+    rows = snapshot.dropna(subset=["Close"]).sort_values("RangePct", ascending=False).head(limit)
+    return "\n".join(f"{symbol}: close {row['Close']:.2f}; {describe(row)}" for symbol, row in rows.iterrows())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Indicators for the symbols in the OHLC history store")
+    parser.add_argument("symbols", nargs="*", help="Symbols to show (default: all)")
+    parser.add_argument("--days", type=int, default=WARMUP_DAYS, help=f"Calendar days of history to use (default: {WARMUP_DAYS})")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    engine = IndicatorEngine()
+    engine.apply_bars(get_history().all_bars(start=date.today() - timedelta(days=args.days)))
+    snap = engine.snapshot()
+    print(f"Computed indicators for {len(snap)} symbols in {time.perf_counter() - started:.3f}s")
+    if args.symbols:
+        snap = snap.loc[[s for s in args.symbols if s in snap.index]]
+    with pd.option_context("display.max_rows", 50, "display.width", 160):
+        print(snap.round(2))
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Intraday (1m/5m) bars for a watchlist, held in memory.
+
+Each symbol gets a BarRing: a preallocated NumPy buffer holding the most
+recent `capacity` bars, so memory stays flat however long the session
+runs. Every bar is written twice, at slot i and i + capacity, which keeps
+the latest window contiguous: window() returns read-only views into the
+buffer without copying.
+
+An IntradayFeed fills the rings by polling the market data provider, or
+by replaying recorded/synthetic bars:
+
+    python intraday.py poll AAPL MSFT --interval 1m
+    python intraday.py replay AAPL MSFT --day 2026-10-16 --speed 60
+"""
+import argparse
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from market_data import get_provider
+from trading_calendar import EXCHANGE_TZ, SESSION_OPEN, current_session, exchange_now
+
+INTERVALS = {"1m": 60, "5m": 300}
+INTERVAL = os.environ.get("INTRADAY_INTERVAL", "1m")
+# Bars kept per symbol; 390 one-minute bars is a full regular session
+CAPACITY = int(os.environ.get("INTRADAY_BARS", "390"))
+WATCHLIST = [s for s in os.environ.get("INTRADAY_WATCHLIST", "").split(",") if s]
+# Symbols watched on demand (beyond the watchlist); the least recently requested is dropped first
+MAX_SYMBOLS = int(os.environ.get("INTRADAY_MAX_SYMBOLS", "50"))
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+class BarRing:
+    """The last `capacity` bars of one symbol: int64 epoch-ns times and float64 OHLCV rows."""
+
+    def __init__(self, capacity: int = CAPACITY):
+        self.capacity = capacity
+        self.times = np.zeros(2 * capacity, dtype=np.int64)
+        self.values = np.full((2 * capacity, len(FIELDS)), np.nan)
+        self.head = 0  # slot the next bar goes to
+        self.count = 0
+
+    @property
+    def last_time(self) -> Optional[int]:
+        return int(self.times[self.head - 1 + self.capacity]) if self.count else None
+
+    def append(self, ts: int, row) -> bool:
+        """
+        Add a bar stamped `ts`. A bar with the latest timestamp replaces it
+        (the in-progress bar was updated); older bars are ignored.
+        """
+        last = self.last_time
+        if last is not None and ts < last:
+            return False
+        if last is not None and ts == last:
+            slot = (self.head - 1) % self.capacity
+        else:
+            slot = self.head
+            self.head = (self.head + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+        for i in (slot, slot + self.capacity):
+            self.values[i] = row
+            self.times[i] = ts
+        return True
+
+    def window(self, bars: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (times, values) views of the latest `bars` bars, oldest first. The
+        views share memory with the ring, so copy them to keep a snapshot
+        that later bars cannot overwrite.
+        """
+        bars = self.count if bars is None else max(0, min(bars, self.count))
+        end = self.head + self.capacity
+        times, values = self.times[end - bars:end], self.values[end - bars:end]
+        times.flags.writeable = False
+        values.flags.writeable = False
+        return times, values
+
+
+class IntradayFeed:
+    """
+    Rings for a watchlist, filled from the market data provider. poll_once()
+    asks for the bars since each symbol's latest one (re-reading it, since
+    it may still be forming); start() does so every interval on a daemon thread.
+    The symbols given here stay watched; at most `max_symbols` more are
+    watched on demand, the least recently watched one making way for a new one.
+    """
+
+    def __init__(self, symbols: Iterable[str] = (), interval: str = INTERVAL, capacity: int = CAPACITY, provider=None,
+                 max_symbols: int = MAX_SYMBOLS):
+        if interval not in INTERVALS:
+            raise ValueError(f"Unsupported interval {interval!r} (expected one of {', '.join(INTERVALS)})")
+        self.interval = interval
+        self.capacity = capacity
+        self.provider = provider or get_provider()
+        self.max_symbols = max_symbols
+        self.rings: Dict[str, BarRing] = {}
+        self._pinned = set(symbols)
+        self._on_demand = OrderedDict()  # symbol -> None, least recently watched first
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.watch(self._pinned)
+
+    def watch(self, symbols: Iterable[str]) -> List[str]:
+        """Start (or keep) tracking `symbols`; returns the ones that were new."""
+        with self._lock:
+            new = [s for s in dict.fromkeys(symbols) if s not in self.rings]
+            for symbol in new:
+                self.rings[symbol] = BarRing(self.capacity)
+            for symbol in dict.fromkeys(symbols):
+                if symbol not in self._pinned:
+                    self._on_demand[symbol] = None
+                    self._on_demand.move_to_end(symbol)
+            while len(self._on_demand) > self.max_symbols:
+                dropped, _ = self._on_demand.popitem(last=False)
+                del self.rings[dropped]
+        return [s for s in new if s in self.rings]
+
+    def ingest(self, symbol: str, frame: pd.DataFrame) -> int:
+        """Append a frame of bars (tz-aware index, OHLCV columns) to the symbol's ring, if it is still watched."""
+        times = frame.index.as_unit("ns").asi8
+        values = frame[FIELDS].to_numpy(dtype="float64")
+        with self._lock:
+            ring = self.rings.get(symbol)
+            if ring is None:
+                return 0
+            return sum(ring.append(int(ts), row) for ts, row in zip(times, values))
+
+    def poll_once(self, now: datetime = None, symbols: Iterable[str] = None) -> int:
+        """Fetch new bars for every watched symbol (or just `symbols`); returns the number of bars written."""
+        now = now or exchange_now()
+        session_open = pd.Timestamp(datetime.combine(current_session(now), SESSION_OPEN, tzinfo=EXCHANGE_TZ))
+        groups: Dict[pd.Timestamp, List[str]] = {}
+        with self._lock:
+            rings = list(self.rings.items()) if symbols is None else [(s, self.rings[s]) for s in symbols if s in self.rings]
+        for symbol, ring in rings:
+            last = ring.last_time
+            since = pd.Timestamp(last, tz="UTC").tz_convert(EXCHANGE_TZ) if last is not None else session_open
+            groups.setdefault(since, []).append(symbol)
+        written = 0
+        for since, symbols in groups.items():
+            try:
+                frames = self.provider.get_intraday(symbols, self.interval, since.to_pydatetime(), now)
+            except Exception as e:
+                print(f"Intraday poll for {len(symbols)} symbols failed: {e}")
+                continue
+            for symbol, frame in frames.items():
+                written += self.ingest(symbol, frame)
+        return written
+
+    def replay(self, frames: Dict[str, pd.DataFrame], speed: float = 0.0) -> int:
+        """
+        Push recorded bars through the rings in timestamp order across
+        symbols. speed=0 loads them at once; speed=60 plays a minute per second.
+        """
+        frames = {s: f for s, f in frames.items() if not f.empty}
+        if not frames:
+            return 0
+        self.watch(frames)
+        symbols = np.concatenate([np.full(len(f), s, dtype=object) for s, f in frames.items()])
+        times = np.concatenate([f.index.as_unit("ns").asi8 for f in frames.values()])
+        values = np.concatenate([f[FIELDS].to_numpy(dtype="float64") for f in frames.values()])
+        written, previous = 0, None
+        for i in np.argsort(times, kind="stable"):
+            ts = int(times[i])
+            if speed and previous is not None and ts != previous:
+                time.sleep((ts - previous) / 1e9 / speed)
+            previous = ts
+            with self._lock:
+                ring = self.rings.get(symbols[i])
+                if ring is not None:
+                    written += ring.append(ts, values[i])
+            if self._stop.is_set():
+                break
+        return written
+
+    def window(self, symbol: str, bars: int = None, copy: bool = False) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        The symbol's ring window (see BarRing.window), or None if it is not
+        watched. With `copy`, a consistent copy taken under the feed lock,
+        for reading while the feed keeps writing (the newest bar is updated
+        in place).
+        """
+        with self._lock:
+            ring = self.rings.get(symbol)
+            if ring is None:
+                return None
+            times, values = ring.window(bars)
+            return (times.copy(), values.copy()) if copy else (times, values)
+
+    def start(self, every: float = None):
+        """Poll every `every` seconds (default: the bar interval) until stop()."""
+        if self._thread and self._thread.is_alive():
+            return
+        every = every or INTERVALS[self.interval]
+        self._stop.clear()
+
+        def run():
+            while not self._stop.is_set():
+                self.poll_once()
+                self._stop.wait(every)
+
+        self._thread = threading.Thread(target=run, name="intraday-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+def window_records(times: np.ndarray, values: np.ndarray) -> List[Dict]:
+    """Ring window -> JSON-ready bar dicts (epoch seconds + OHLCV)."""
+    return [dict(t=int(t) // 1_000_000_000, **dict(zip(FIELDS, row))) for t, row in zip(times.tolist(), values.tolist())]
+
+
+_feed = None
+_feed_lock = threading.Lock()
+
+
+def get_feed() -> IntradayFeed:
+    """Return the process-wide feed for INTRADAY_WATCHLIST, polling in the background."""
+    global _feed
+    if _feed is None:
+        with _feed_lock:
+            if _feed is None:
+                _feed = IntradayFeed(WATCHLIST)
+                _feed.start()
+    return _feed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Intraday bars for a watchlist in per-symbol ring buffers")
+    parser.add_argument("mode", choices=["poll", "replay"])
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--interval", choices=list(INTERVALS), default=INTERVAL, help=f"Bar size (default: {INTERVAL})")
+    parser.add_argument("--bars", type=int, default=CAPACITY, help=f"Bars kept per symbol (default: {CAPACITY})")
+    parser.add_argument("--day", type=date.fromisoformat, default=None, help="Session to replay (default: the current one)")
+    parser.add_argument("--speed", type=float, default=0.0, help="Replay speed-up; 0 loads everything at once (default: 0)")
+    args = parser.parse_args()
+
+    feed = IntradayFeed(args.symbols, interval=args.interval, capacity=args.bars)
+    if args.mode == "replay":
+        day = args.day or current_session()
+        start = datetime.combine(day, SESSION_OPEN, tzinfo=EXCHANGE_TZ)
+        frames = feed.provider.get_intraday(args.symbols, args.interval, start, start.replace(hour=23, minute=59))
+        print(f"Replayed {feed.replay(frames, speed=args.speed)} bars")
+    else:
+        print(f"Polled {feed.poll_once()} bars")
+    for symbol in args.symbols:
+        times, values = feed.window(symbol, 5)
+        print(symbol)
+        print(pd.DataFrame(values, columns=FIELDS, index=pd.to_datetime(times, utc=True).tz_convert(EXCHANGE_TZ)))
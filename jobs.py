@@ -0,0 +1,129 @@
+"""
+Background jobs for the web viewer.
+
+Slow upstream work (Nasdaq summaries, yfinance quotes) runs on a small
+thread pool instead of inside a Flask request. submit() returns a Job at
+once; its id is what the page polls (/jobs/<id>) until the job is done.
+A submit for a (kind, symbol) that is already queued or running returns
+that job, so concurrent page loads share one fetch. Finished jobs are
+kept for JOB_TTL seconds so late pollers still see them.
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "4"))
+JOB_TTL = float(os.environ.get("JOB_TTL", "600"))
+
+
+class Job:
+    """One submitted call: queued -> running -> done | error."""
+
+    def __init__(self, kind: str, symbol: str = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.symbol = symbol
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "error")
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "symbol": self.symbol,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobExecutor:
+    """Runs jobs on a thread pool and keeps their status by id."""
+
+    def __init__(self, workers: int = JOB_WORKERS, ttl: float = JOB_TTL):
+        self.ttl = ttl
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="job")
+        self._jobs: Dict[str, Job] = {}
+        self._active: Dict[Tuple[str, str], Job] = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.deduplicated = 0
+
+    def submit(self, kind: str, fn: Callable, *args, symbol: str = None, **kwargs) -> Job:
+        """Queue fn(*args, **kwargs), or return the unfinished job already queued for (kind, symbol)."""
+        key = (kind, symbol)
+        with self._lock:
+            self.submitted += 1
+            job = self._active.get(key) if symbol is not None else None
+            if job is not None:
+                self.deduplicated += 1
+                return job
+            self._prune()
+            job = Job(kind, symbol)
+            self._jobs[job.id] = job
+            if symbol is not None:
+                self._active[key] = job
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: Job, fn: Callable, args, kwargs):
+        job.status = "running"
+        try:
+            job.result = fn(*args, **kwargs)
+            status = "done"
+        except Exception as e:
+            job.error = str(e) or type(e).__name__
+            status = "error"
+            print(f"Job {job.kind} {job.symbol or ''} failed: {job.error}")
+        with self._lock:
+            job.finished_at = time.time()
+            job.status = status
+            if self._active.get((job.kind, job.symbol)) is job:
+                del self._active[(job.kind, job.symbol)]
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "active": len(self._active),
+                "tracked": len(self._jobs),
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> JobExecutor:
+    """Return the process-wide job executor."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = JobExecutor()
+    return _executor
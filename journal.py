@@ -0,0 +1,141 @@
+import json
+import os
+import threading
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional
+
+
+def journal_path(output_file: str, day: Optional[date] = None, part: Optional[int] = None) -> str:
+    """
+    Journal for one trading day sits next to the output, e.g. nasdaq_summary.2024-05-01.jsonl;
+    shard workers get their own, e.g. nasdaq_summary.2024-05-01.part-3.jsonl
+    """
+    base, _ = os.path.splitext(output_file)
+    suffix = f".part-{part}" if part is not None else ""
+    return f"{base}.{(day or date.today()).isoformat()}{suffix}.jsonl"
+
+
+class IngestJournal:
+    """
+    Append-only JSON-lines journal of fetched rows.
+    Each row is flushed as soon as it arrives, so an interrupted run keeps
+    everything fetched so far; the symbols already in the journal are the
+    checkpoint a rerun uses to skip work.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        drop_torn_tail(path)
+        self.done = set(row["Symbol"] for row in iter_journal(path))
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def append(self, row: Dict):
+        line = json.dumps(row, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self.done.add(row["Symbol"])
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ChangeLog:
+    """Append-only JSON-lines change set: one {symbol, field, old, new} per changed field."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        drop_torn_tail(path)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, symbol: str, field: str, old, new):
+        self._file.write(json.dumps({"symbol": symbol, "field": field, "old": old, "new": new}, ensure_ascii=False) + "\n")
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def drop_torn_tail(path: str) -> int:
+    """
+    Truncate a JSON-lines file back to its last newline, so a line left
+    half-written by a crash is not fused with the next append. Returns the
+    number of bytes dropped.
+    """
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - 4096)
+            f.seek(start)
+            chunk = f.read(end - start)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                end = start + newline + 1
+                break
+            end = start
+        if end < size:
+            f.truncate(end)
+        return size - end
+
+
+def changes_path(output_file: str, day: Optional[date] = None) -> str:
+    """Change set for one trading day, e.g. nasdaq_summary.2024-05-01.changes.jsonl"""
+    base, _ = os.path.splitext(output_file)
+    return f"{base}.{(day or date.today()).isoformat()}.changes.jsonl"
+
+
+def prune_journals(output_file: str, today: Optional[date] = None, keep_changes_days: int = 7) -> List[str]:
+    """
+    Delete the dated files next to `output_file` from before `today`:
+    journals and shard parts are only a checkpoint for the day they were
+    written, change sets are kept for `keep_changes_days`. Returns the
+    removed paths.
+    """
+    base, _ = os.path.splitext(output_file)
+    folder, prefix = os.path.dirname(base) or ".", os.path.basename(base) + "."
+    today = today or date.today()
+    removed = []
+    for name in os.listdir(folder):
+        if not (name.startswith(prefix) and name.endswith(".jsonl")):
+            continue
+        try:
+            day = date.fromisoformat(name[len(prefix):len(prefix) + 10])
+        except ValueError:
+            continue
+        keep_from = today - timedelta(days=keep_changes_days) if name.endswith(".changes.jsonl") else today
+        if day < keep_from:
+            path = os.path.join(folder, name)
+            os.remove(path)
+            removed.append(path)
+    return removed
+
+
+def iter_journal(path: str) -> Iterator[Dict]:
+    """Yield journal rows in write order, skipping a torn last line from a crash."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
@@ -0,0 +1,336 @@
+"""
+Market data providers behind one batch interface.
+
+    get_summary(symbols, on_row=None, **options) -> [row, ...]
+        Nasdaq-style summary rows ({"Symbol": ..., "Exchange": ..., ...}) in
+        input order; with `on_row` each row is handed over as it arrives.
+    lookup_summary(symbol, use_cache=True) -> row or None
+        One symbol's summary row, for interactive lookups.
+    get_bars(symbols, start, end) -> {symbol: DataFrame}
+        Daily OHLCV bars in [start, end), indexed by exchange-local timestamps.
+        An empty frame means the symbol has no bars in the range; a symbol
+        that could not be fetched is left out.
+    get_intraday(symbols, interval, start, end) -> {symbol: DataFrame}
+        "1m"/"5m" OHLCV bars starting in [start, end) (tz-aware datetimes).
+
+MARKET_DATA_PROVIDER selects the process-wide provider:
+    live     api.nasdaq.com (stock.py's client) and yfinance (default)
+    offline  deterministic recorded/synthetic data, no network; see
+             MARKET_DATA_FIXTURES and MARKET_DATA_LATENCY
+
+    MARKET_DATA_PROVIDER=offline MARKET_DATA_LATENCY=0.02 python stock.py --workers 16 --rate 500
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from mock_nasdaq_api import synthetic_summary
+from trading_calendar import EXCHANGE_TZ, SESSION_OPEN, close_time, is_trading_day
+
+PROVIDER = os.environ.get("MARKET_DATA_PROVIDER", "live").lower()
+# Directory of recorded data: <SYMBOL>.csv bars (yfinance history().to_csv())
+# and <SYMBOL>.summary.json summaryData blocks
+FIXTURES_DIR = os.environ.get("MARKET_DATA_FIXTURES")
+# Simulated seconds per request for the offline provider
+LATENCY = float(os.environ.get("MARKET_DATA_LATENCY", "0"))
+
+# Synthetic random walks start here, so any date range yields the same bars
+SYNTHETIC_EPOCH = date(2000, 1, 3)
+
+
+class MarketDataProvider(ABC):
+    """Base class; subclasses implement the batch methods."""
+
+    name = "base"
+
+    @abstractmethod
+    def get_summary(self, symbols: List[str], on_row: Callable = None, **options) -> List[Dict]:
+        ...
+
+    def lookup_summary(self, symbol: str, use_cache: bool = True) -> Optional[Dict]:
+        rows = self.get_summary([symbol], use_cache=use_cache)
+        return rows[0] if rows else None
+
+    @abstractmethod
+    def get_bars(self, symbols: List[str], start: date, end: date) -> Dict[str, pd.DataFrame]:
+        ...
+
+    @abstractmethod
+    def get_intraday(self, symbols: List[str], interval: str, start: datetime, end: datetime) -> Dict[str, pd.DataFrame]:
+        ...
+
+
+class LiveProvider(MarketDataProvider):
+    """
+    Summaries from the Nasdaq API through stock.py's pooled, rate-limited
+    client (options: workers, rate, max_rate, burst, max_attempts,
+    use_cache, use_async); bars from grouped yf.download requests.
+    yf.download does not tell a failed symbol from one without bars, so
+    symbols with no rows are always left out.
+    """
+
+    name = "live"
+
+    def get_summary(self, symbols, on_row=None, use_async=False, **options):
+        import stock
+
+        if use_async:
+            options["concurrency"] = options.pop("workers", stock.POOL_SIZE)
+            return asyncio.run(stock.fetch_summaries_async(symbols, on_row=on_row, **options))
+        return stock.fetch_all(symbols, on_row=on_row, **options)
+
+    def lookup_summary(self, symbol, use_cache=True):
+        import stock
+
+        # One request through the process-wide lookup limiter, without fetch_all's batch machinery
+        return stock.fetch_summary_status(symbol, use_cache=use_cache, limiter=stock.get_lookup_limiter())[1]
+
+    def get_bars(self, symbols, start, end):
+        import yfinance as yf
+
+        data = yf.download(symbols, start=start.isoformat(), end=end.isoformat(), interval="1d",
+                           group_by="ticker", auto_adjust=False, progress=False, threads=True)
+        frames = {}
+        for symbol in symbols:
+            if data.columns.nlevels > 1:
+                if symbol not in data.columns.get_level_values(0):
+                    continue
+                frame = data[symbol]
+            else:
+                frame = data
+            frame = frame.dropna(subset=["Open", "High", "Low", "Close"])
+            if not frame.empty:
+                frames[symbol] = frame
+        return frames
+
+    def get_intraday(self, symbols, interval, start, end):
+        import yfinance as yf
+
+        data = yf.download(symbols, start=start, end=end, interval=interval, group_by="ticker",
+                           auto_adjust=False, progress=False, threads=True, prepost=False)
+        frames = {}
+        for symbol in symbols:
+            if data.columns.nlevels > 1:
+                if symbol not in data.columns.get_level_values(0):
+                    continue
+                frame = data[symbol]
+            else:
+                frame = data
+            frame = frame.dropna(subset=["Open", "High", "Low", "Close"])
+            if not frame.empty:
+                frames[symbol] = frame.tz_convert(EXCHANGE_TZ)
+        return frames
+
+
+class OfflineProvider(MarketDataProvider):
+    """
+    Deterministic local data: recorded fixtures from `fixtures_dir` when
+    present, synthetic data otherwise. `latency` seconds stand in for one
+    network round trip: per symbol for summaries (one request each, spread
+    over `workers` and paced by the same AIMD limiter as the live client
+    when `rate` is given), per call for bars and intraday (one batched
+    download each).
+    """
+
+    name = "offline"
+
+    def __init__(self, fixtures_dir: str = None, latency: float = 0.0, payload_size: int = 0):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.payload_size = payload_size
+
+    def _fixture(self, name: str):
+        path = os.path.join(self.fixtures_dir, name) if self.fixtures_dir else None
+        return path if path and os.path.exists(path) else None
+
+    def _summary_row(self, symbol: str) -> Dict:
+        import stock
+
+        path = self._fixture(f"{symbol}.summary.json")
+        if path:
+            with open(path, encoding="utf-8") as f:
+                summary = json.load(f)
+        else:
+            summary = synthetic_summary(symbol, self.payload_size)
+        return stock.parse_summary(symbol, {"data": {"summaryData": summary}})
+
+    def get_summary(self, symbols, on_row=None, workers=1, rate=None, max_rate=None, burst=1.0, use_async=False,
+                    **options):
+        import stock
+
+        symbols = list(symbols)
+        limiter = stock.make_limiter(workers, rate, max_rate, burst) if rate else None
+        if use_async:
+            rows = asyncio.run(self._get_summary_async(symbols, on_row, workers, limiter))
+        else:
+            def fetch(symbol):
+                if limiter:
+                    limiter.acquire()
+                try:
+                    if self.latency:
+                        time.sleep(self.latency)
+                    row = self._summary_row(symbol)
+                finally:
+                    if limiter:
+                        limiter.release(200)
+                if on_row:
+                    on_row(row)
+                    return None
+                return row
+
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                rows = list(pool.map(fetch, symbols))
+        return [row for row in rows if row]
+
+    async def _get_summary_async(self, symbols, on_row, workers, limiter) -> List[Optional[Dict]]:
+        rows = [None] * len(symbols)
+        todo = iter(enumerate(symbols))
+
+        async def worker():
+            for i, symbol in todo:
+                if limiter:
+                    await limiter.acquire_async()
+                try:
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    row = self._summary_row(symbol)
+                finally:
+                    if limiter:
+                        limiter.release(200)
+                if on_row:
+                    on_row(row)
+                else:
+                    rows[i] = row
+
+        await asyncio.gather(*(worker() for _ in range(max(1, workers))))
+        return rows
+
+    def get_bars(self, symbols, start, end):
+        if self.latency:
+            time.sleep(self.latency)
+        frames = {}
+        for symbol in symbols:
+            path = self._fixture(f"{symbol}.csv")
+            if path:
+                frame = pd.read_csv(path, index_col=0, parse_dates=True)
+                days = frame.index.date
+                frame = frame[(days >= start) & (days < end)]
+            else:
+                frame = synthetic_bars(symbol, start, end)
+            # Local data is authoritative, so an empty range is reported as such
+            frames[symbol] = frame
+        return frames
+
+    def get_intraday(self, symbols, interval, start, end):
+        if self.latency:
+            time.sleep(self.latency)
+        start, end = pd.Timestamp(start).tz_convert(EXCHANGE_TZ), pd.Timestamp(end).tz_convert(EXCHANGE_TZ)
+        frames = {}
+        for symbol in symbols:
+            path = self._fixture(f"{symbol}.{interval}.csv")
+            if path:
+                frame = pd.read_csv(path, index_col=0, parse_dates=True)
+                frame.index = pd.to_datetime(frame.index, utc=True).tz_convert(EXCHANGE_TZ)
+            else:
+                days = pd.date_range(start.date(), end.date(), freq="D")
+                parts = [synthetic_session(symbol, day.date(), interval) for day in days if is_trading_day(day.date())]
+                frame = pd.concat(parts) if parts else pd.DataFrame(columns=["Open", "High", "Low", "Close", "Volume"])
+            frame = frame[(frame.index >= start) & (frame.index < end)]
+            if not frame.empty:
+                frames[symbol] = frame
+        return frames
+
+
+@lru_cache(maxsize=8)
+def _business_days(last: date) -> pd.DatetimeIndex:
+    return pd.bdate_range(SYNTHETIC_EPOCH, max(last, SYNTHETIC_EPOCH))
+
+
+def synthetic_bars(symbol: str, start: date, end: date) -> pd.DataFrame:
+    """
+    Deterministic random-walk business-day bars in [start, end). The walk
+    is anchored at SYNTHETIC_EPOCH, so a date has the same bar whatever
+    range it was asked for in.
+    """
+    index = _business_days(end - timedelta(days=1))
+    n = len(index)
+    lo = index.searchsorted(pd.Timestamp(start))
+    seed = zlib.crc32(symbol.encode("utf-8"))
+    # One stream per series, so each is a prefix of the same sequence for any n
+    streams = [np.random.default_rng([seed, k]) for k in range(5)]
+    base = np.random.default_rng(seed).uniform(5, 500)
+    close = base * np.exp(np.cumsum(streams[0].normal(0, 0.015, n)))
+    open_ = close * (1 + streams[1].normal(0, 0.01, n))
+    high = np.maximum(open_, close) * (1 + streams[2].uniform(0, 0.02, n))
+    low = np.minimum(open_, close) * (1 - streams[3].uniform(0, 0.02, n))
+    volume = streams[4].integers(10_000, 50_000_000, n)
+    return pd.DataFrame(
+        {"Open": open_[lo:], "High": high[lo:], "Low": low[lo:], "Close": close[lo:], "Volume": volume[lo:]},
+        index=index[lo:].tz_localize("America/New_York"),
+    )
+
+
+@lru_cache(maxsize=4096)
+def synthetic_session(symbol: str, day: date, interval: str = "1m") -> pd.DataFrame:
+    """
+    Deterministic intraday bars for one session, walking from that day's
+    synthetic daily open. "5m" bars are aggregated from the "1m" ones.
+    """
+    opened = datetime.combine(day, SESSION_OPEN, tzinfo=EXCHANGE_TZ)
+    closes = datetime.combine(day, close_time(day), tzinfo=EXCHANGE_TZ)
+    index = pd.date_range(opened, closes, freq="1min", inclusive="left")
+    daily = synthetic_bars(symbol, day, day + timedelta(days=1))
+    base = float(daily["Open"].iloc[0]) if not daily.empty else 100.0
+    rng = np.random.default_rng([zlib.crc32(symbol.encode("utf-8")), day.toordinal()])
+    n = len(index)
+    close = base * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+    open_ = np.concatenate([[base], close[:-1]])
+    frame = pd.DataFrame({
+        "Open": open_,
+        "High": np.maximum(open_, close) * (1 + rng.uniform(0, 0.001, n)),
+        "Low": np.minimum(open_, close) * (1 - rng.uniform(0, 0.001, n)),
+        "Close": close,
+        "Volume": rng.integers(100, 50_000, n).astype("float64"),
+    }, index=index)
+    if interval == "5m":
+        frame = frame.resample("5min").agg({"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"})
+    return frame
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def make_provider(name: str = PROVIDER) -> MarketDataProvider:
+    if name == "offline":
+        return OfflineProvider(FIXTURES_DIR, LATENCY)
+    if name == "live":
+        return LiveProvider()
+    raise ValueError(f"Unknown MARKET_DATA_PROVIDER {name!r} (expected 'live' or 'offline')")
+
+
+def get_provider() -> MarketDataProvider:
+    """Return the process-wide provider selected by MARKET_DATA_PROVIDER."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = make_provider()
+    return _provider
+
+
+def set_provider(provider: MarketDataProvider):
+    """Replace the process-wide provider (e.g. an OfflineProvider in a benchmark)."""
+    global _provider
+    _provider = provider
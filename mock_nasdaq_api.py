@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Nasdaq quote summary endpoint.
+
+Serves deterministic synthetic summaryData for any symbol at
+/api/quote/<SYMBOL>/summary over HTTP/1.1 keep-alive, so ingestion
+throughput can be measured without touching api.nasdaq.com:
+
+    python mock_nasdaq_api.py --port 8765
+    NASDAQ_API_BASE=http://127.0.0.1:8765 python stock.py --workers 16 --rate 1000
+
+Latency, error rate (429s) and payload size are configurable so the
+ingest path can be exercised under realistic or hostile conditions.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SUMMARY_PATH = re.compile(r"^/api/quote/([^/]+)/summary$")
+
+
+def synthetic_summary(symbol: str, payload_size: int = 0) -> dict:
+    """
+    Build a summaryData block that looks like the real API response.
+    payload_size pads the block with extra fields to roughly that many bytes.
+    """
+    rnd = random.Random(zlib.crc32(symbol.encode("utf-8")))
+    price = rnd.uniform(5, 500)
+    low, high = price * rnd.uniform(0.95, 0.99), price * rnd.uniform(1.01, 1.05)
+    low52, high52 = price * rnd.uniform(0.5, 0.9), price * rnd.uniform(1.1, 1.8)
+    volume = rnd.randint(10_000, 50_000_000)
+    market_cap = price * rnd.randint(10_000_000, 5_000_000_000)
+    fields = {
+        "Exchange": ("Exchange", "NASDAQ-GS"),
+        "Sector": ("Sector", rnd.choice(["Technology", "Health Care", "Finance", "Energy", "Consumer Discretionary"])),
+        "Industry": ("Industry", rnd.choice(["Computer Software", "Biotechnology", "Major Banks", "Oil & Gas", "Retail"])),
+        "OneYrTarget": ("1 Year Target", f"${price * rnd.uniform(0.9, 1.3):,.2f}"),
+        "TodayHighLow": ("Today's High/Low", f"${high:,.2f}/${low:,.2f}"),
+        "ShareVolume": ("Share Volume", f"{volume:,}"),
+        "AverageVolume": ("Average Volume", f"{int(volume * rnd.uniform(0.7, 1.3)):,}"),
+        "PreviousClose": ("Previous Close", f"${price:,.2f}"),
+        "FiftTwoWeekHighLow": ("52 Week High/Low", f"${high52:,.2f}/${low52:,.2f}"),
+        "MarketCap": ("Market Cap", f"{int(market_cap):,}"),
+        "PERatio": ("P/E Ratio", round(rnd.uniform(5, 80), 2)),
+        "ForwardPE1Yr": ("Forward P/E 1 Yr.", f"{rnd.uniform(5, 60):.2f}"),
+        "EarningsPerShare": ("Earnings Per Share(EPS)", f"${rnd.uniform(-2, 15):,.2f}"),
+        "AnnualizedDividend": ("Annualized Dividend", f"${rnd.uniform(0, 4):,.2f}"),
+        "ExDividendDate": ("Ex Dividend Date", f"{rnd.randint(1, 12):02d}/{rnd.randint(1, 28):02d}/2024"),
+        "DividendPaymentDate": ("Dividend Pay Date", f"{rnd.randint(1, 12):02d}/{rnd.randint(1, 28):02d}/2024"),
+        "Yield": ("Current Yield", f"{rnd.uniform(0, 5):.2f}%"),
+        "Beta": ("Beta", round(rnd.uniform(0.3, 2.5), 2)),
+    }
+    summary = {key: {"label": label, "value": value} for key, (label, value) in fields.items()}
+    for i in range(max(0, payload_size - 1200) // 80):
+        summary[f"Extra{i}"] = {"label": f"Extra field {i}", "value": f"{rnd.random():.30f}"}
+    return summary
+
+
+class MockNasdaqHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep connections open between requests
+    disable_nagle_algorithm = True
+    latency = 0.0
+    error_rate = 0.0
+    payload_size = 0
+
+    def do_GET(self):
+        match = SUMMARY_PATH.match(self.path.split("?")[0])
+        if not match:
+            self._send(404, {"data": None, "status": {"rCode": 404}})
+            return
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            self._send(429, {"data": None, "message": "Too Many Requests"})
+            return
+        symbol = match.group(1).upper()
+        self._send(200, {
+            "data": {"symbol": symbol, "summaryData": synthetic_summary(symbol, self.payload_size)},
+            "message": None,
+            "status": {"rCode": 200},
+        })
+
+    def _send(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        etag = f'"{zlib.crc32(body):08x}"'
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # per-request logging would dominate the measurements
+
+
+def make_handler(latency: float = 0.0, error_rate: float = 0.0, payload_size: int = 0):
+    return type("Handler", (MockNasdaqHandler,), {
+        "latency": latency, "error_rate": error_rate, "payload_size": payload_size,
+    })
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 error_rate: float = 0.0, payload_size: int = 0):
+    """
+    Start the mock API on a background thread.
+    Returns (server, base_url); call server.shutdown() to stop it.
+    """
+    handler = make_handler(latency, error_rate, payload_size)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local mock of the Nasdaq quote summary API")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of artificial delay per request (default: 0)")
+    parser.add_argument("--error-rate", type=float, default=0.0, dest="error_rate", help="Fraction of requests answered with 429 (default: 0)")
+    parser.add_argument("--payload-size", type=int, default=0, dest="payload_size", help="Approximate summaryData size in bytes (default: natural size)")
+    args = parser.parse_args()
+
+    handler = make_handler(args.latency, args.error_rate, args.payload_size)
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"Mock Nasdaq API on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -4,6 +4,7 @@ import os
 import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)) )
 from fetch_ohlc_yfinance import fetch_ohlc_yfinance
+from normalize import format_field
 
 app = Flask(__name__)
 
@@ -12,8 +13,9 @@ CSV_FILE = "nasdaq_summary.csv"
 from stock import fetch_summary
 
 def fetch_yahoo_finance(symbol):
-    # Use yfinance-based function only
-    return fetch_ohlc_yfinance(symbol)
+    # Use yfinance-based function only; the CSV keeps display strings
+    ohlc_data = fetch_ohlc_yfinance(symbol)
+    return {k: format_field(k, v) for k, v in ohlc_data.items()} if ohlc_data else None
 
 TEMPLATE = '''
 <!DOCTYPE html>
@@ -4,6 +4,7 @@ import os
 import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from fetch_ohlc_yfinance import fetch_ohlc_yfinance
+from normalize import format_field
 from stock import fetch_summary
 import subprocess
 
@@ -11,6 +12,12 @@ app = Flask(__name__)
 
 CSV_FILE = "nasdaq_summary.csv"
 
+
+def fetch_ohlc_display(symbol):
+    """OHLC fields as display strings, which is what this viewer keeps in nasdaq_summary.csv."""
+    ohlc_data = fetch_ohlc_yfinance(symbol)
+    return {k: format_field(k, v) for k, v in ohlc_data.items()} if ohlc_data else None
+
 TEMPLATE = '''
 <!DOCTYPE html>
 <html lang="en">
@@ -153,7 +160,7 @@ def index():
     if search:
         if search not in tickers:
             new_row = fetch_summary(search) or {"Symbol": search}
-            ohlc_data = fetch_ohlc_yfinance(search)
+            ohlc_data = fetch_ohlc_display(search)
             if ohlc_data:
                 new_row.update(ohlc_data)
             df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
@@ -167,7 +174,7 @@ def index():
                 row_dict = details_row.iloc[0].to_dict()
                 missing_fields = [f for f in ["Today High", "Today Low", "Today Open", "Today Close", "Previous High", "Previous Low", "Previous Open", "Previous Close"] if row_dict.get(f) in [None, '', 'None'] or pd.isna(row_dict.get(f))]
                 if missing_fields:
-                    ohlc_data = fetch_ohlc_yfinance(search)
+                    ohlc_data = fetch_ohlc_display(search)
                     if ohlc_data:
                         for k, v in ohlc_data.items():
                             if v not in [None, '', 'None']:
@@ -191,7 +198,7 @@ def fetch_ohlc():
     df = pd.read_csv(CSV_FILE)
     details_row = df[df["Symbol"] == symbol]
     if not details_row.empty:
-        ohlc_data = fetch_ohlc_yfinance(symbol)
+        ohlc_data = fetch_ohlc_display(symbol)
         if ohlc_data:
             for k, v in ohlc_data.items():
                 if v not in [None, '', 'None']:
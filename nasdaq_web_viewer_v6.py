@@ -6,6 +6,7 @@ import subprocess
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from fetch_ohlc_yfinance import fetch_ohlc_yfinance  # noqa: E402
+from normalize import format_field  # noqa: E402
 from stock import fetch_summary  # noqa: E402
 
 app = Flask(__name__)
@@ -14,6 +15,12 @@ CSV_FILE = "nasdaq_summary.csv"
 DT_CSV = "day_trading_recommendation.csv"
 
 
+def fetch_ohlc_display(symbol):
+    """OHLC fields as display strings, which is what this viewer keeps in nasdaq_summary.csv."""
+    ohlc_data = fetch_ohlc_yfinance(symbol)
+    return {k: format_field(k, v) for k, v in ohlc_data.items()} if ohlc_data else None
+
+
 def _dt_csv_path() -> str:
     return os.path.join(os.path.dirname(os.path.abspath(__file__)), DT_CSV)
 
@@ -263,7 +270,7 @@ def index():
     if search:
         if search not in tickers:
             new_row = fetch_summary(search) or {"Symbol": search}
-            ohlc_data = fetch_ohlc_yfinance(search)
+            ohlc_data = fetch_ohlc_display(search)
             if ohlc_data:
                 new_row.update(ohlc_data)
             df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
@@ -290,7 +297,7 @@ def index():
                     if row_dict.get(f) in [None, "", "None"] or pd.isna(row_dict.get(f))
                 ]
                 if missing_fields:
-                    ohlc_data = fetch_ohlc_yfinance(search)
+                    ohlc_data = fetch_ohlc_display(search)
                     if ohlc_data:
                         for k, v in ohlc_data.items():
                             if v not in [None, "", "None"]:
@@ -317,7 +324,7 @@ def fetch_ohlc():
     df = pd.read_csv(CSV_FILE)
     details_row = df[df["Symbol"] == symbol]
     if not details_row.empty:
-        ohlc_data = fetch_ohlc_yfinance(symbol)
+        ohlc_data = fetch_ohlc_display(symbol)
         if ohlc_data:
             for k, v in ohlc_data.items():
                 if v not in [None, "", "None"]:
@@ -1,17 +1,37 @@
+import atexit
 import os
+import secrets
 import sys
 import subprocess
 import threading
-from flask import Flask, render_template_string, request, jsonify, send_file, redirect
+from flask import Flask, Response, render_template_string, request, jsonify, send_file, redirect
 import pandas as pd
-from fetch_ohlc_yfinance import fetch_ohlc_yfinance  # noqa: E402
+from multiprocessing import AuthenticationError
+from fetch_ohlc_yfinance import fetch_ohlc_yfinance, ohlc_record  # noqa: E402
+from intraday import get_feed, window_records  # noqa: E402
 from stock import fetch_summary  # noqa: E402
+from normalize import format_field, normalize_records  # noqa: E402
+from summary_store import get_store, get_writer  # noqa: E402
+from events import bus  # noqa: E402
+from jobs import get_executor  # noqa: E402
+from run_local_gpt2_prompt import generate_remote, run_assistant, wait_for_worker  # noqa: E402
+from singleflight import single_flight  # noqa: E402
 
 app = Flask(__name__)
+# Store values are typed; currency/number formatting happens only in templates
+app.jinja_env.globals["format_field"] = format_field
 
 CSV_FILE = "nasdaq_summary.csv"
 DT_CSV = "day_trading_recommendation.csv"
 
+OHLC_FIELDS = [
+    "Today High", "Today Low", "Today Open", "Today Close",
+    "Previous High", "Previous Low", "Previous Open", "Previous Close",
+]
+
+# Seed the summary store from the legacy CSV the first time the viewer runs
+get_store().import_csv_if_empty(CSV_FILE)
+
 V6_TEMPLATE = '''
 <nav style="background:#222;padding:12px 24px;display:flex;align-items:center;gap:32px;border-radius:8px 8px 0 0;">
 <a href="/home" style="color:#ffd700;text-decoration:none;font-weight:bold;">Home</a>
@@ -31,10 +51,10 @@ V6_TEMPLATE = '''
             <input id="search-box" class="search-box" type="text" name="search" placeholder="Search ticker..." value="{{ search or '' }}" style="padding:8px;width:90%;margin-bottom:8px;" />
             <button type="submit">Search</button>
         </form>
-        <ul style="list-style:none;padding:0;margin:0;">
+        <ul id="ticker-list" style="list-style:none;padding:0;margin:0;">
             {% for ticker in tickers %}
             <li style="margin-bottom:4px;">
-                <button style="width:100%;padding:8px 12px;background:#333;color:#ffd700;border:none;border-radius:6px;cursor:pointer;text-align:left;{% if ticker == selected %}font-weight:bold;background:#222;{% endif %}" onclick="window.location.href='/home?symbol={{ ticker }}'">{{ ticker }}</button>
+                <button data-ticker="{{ ticker }}" style="width:100%;padding:8px 12px;background:#333;color:#ffd700;border:none;border-radius:6px;cursor:pointer;text-align:left;{% if ticker == selected %}font-weight:bold;background:#222;{% endif %}" onclick="window.location.href='/home?symbol={{ ticker }}'">{{ ticker }}</button>
             </li>
             {% endfor %}
         </ul>
@@ -48,7 +68,7 @@ V6_TEMPLATE = '''
                     <button onclick="runDayTradingAssistant()" style="background:#ffd700;color:#222;border:none;padding:6px 10px;border-radius:6px;cursor:pointer;font-weight:bold;">Run</button>
                     <button onclick="fetchDaytradingData()" style="background:#ffd700;color:#222;border:none;padding:6px 10px;border-radius:6px;cursor:pointer;font-weight:bold;">Refresh</button>
                     <div class="spinner" id="dt-spinner" style="display:none;width:18px;height:18px;border:3px solid #ffd700;border-top-color:#d4a200;border-radius:50%;animation:spin 1s linear infinite;"></div>
-                    <label style="display:flex;align-items:center;gap:6px;color:#222;font-size:0.9em;"><input type="checkbox" onchange="toggleAutoRefresh(this)"> Auto-refresh</label>
+                    <label style="display:flex;align-items:center;gap:6px;color:#222;font-size:0.9em;"><input type="checkbox" checked onchange="toggleAutoRefresh(this)"> Live updates</label>
                     <a href="/download_daytrading_csv" style="color:#d4a200;text-decoration:none;margin-left:auto;">Download CSV</a>
                 </div>
                 <div id="dt-info" class="muted" style="margin-bottom:6px;color:#222;"></div>
@@ -73,7 +93,11 @@ V6_TEMPLATE = '''
             if (spinner) spinner.style.display = 'none';
           }
         }
+        let dtData = null;
+        let events = null;
+        const selectedSymbol = {{ selected|tojson }};
         function renderDaytrading(data) {
+          dtData = data;
           const info = document.getElementById('dt-info');
           const cont = document.getElementById('dt-content');
           const ts = data.updated_at ? `Updated: <span class="pill">${new Date(data.updated_at*1000).toLocaleString()}</span>` : '';
@@ -96,7 +120,39 @@ V6_TEMPLATE = '''
           }).join('') + '</tbody>';
           return '<table id="dt-table" style="width:100%;border-collapse:collapse;">' + thead + tbody + '</table>';
         }
-        window.addEventListener('DOMContentLoaded', fetchDaytradingData);
+        function applySummaryChange(change) {
+          const list = document.getElementById('ticker-list');
+          for (const ticker of change.added) {
+            if (document.querySelector(`#ticker-list button[data-ticker="${ticker}"]`)) continue;
+            const li = document.createElement('li');
+            li.style.marginBottom = '4px';
+            const btn = document.createElement('button');
+            btn.dataset.ticker = ticker;
+            btn.textContent = ticker;
+            btn.style.cssText = 'width:100%;padding:8px 12px;background:#333;color:#ffd700;border:none;border-radius:6px;cursor:pointer;text-align:left;';
+            btn.onclick = () => { window.location.href = '/home?symbol=' + encodeURIComponent(ticker); };
+            li.appendChild(btn);
+            list.appendChild(li);
+          }
+          if (selectedSymbol && (change.changed.includes(selectedSymbol) || change.added.includes(selectedSymbol))) {
+            window.location.href = '/home?symbol=' + encodeURIComponent(selectedSymbol);
+          }
+        }
+        function connectEvents() {
+          // Pushed by the server only when the recommendations CSV or the summary store changes
+          events = new EventSource('/events?topics=recommendations,summary');
+          events.addEventListener('recommendations', e => renderDaytrading(JSON.parse(e.data)));
+          events.addEventListener('summary', e => applySummaryChange(JSON.parse(e.data)));
+        }
+        function toggleAutoRefresh(cb) {
+          if (cb.checked && !events) {
+            connectEvents();
+          } else if (!cb.checked && events) {
+            events.close();
+            events = null;
+          }
+        }
+        window.addEventListener('DOMContentLoaded', () => { fetchDaytradingData(); connectEvents(); });
         document.getElementById('show-summary-btn').onclick = function() {
           const radios = document.getElementsByName('dt-ticker');
           let selectedIdx = null;
@@ -106,18 +162,35 @@ V6_TEMPLATE = '''
             document.getElementById('summary-popup').style.display = 'block';
             return;
           }
-          fetch('/daytrading_data').then(r=>r.json()).then(data=>{
-            if (data.table && data.table[selectedIdx] && data.table[selectedIdx].Summary) {
-              document.getElementById('summary-content').innerHTML = `<div style='white-space:pre-line;'>${data.table[selectedIdx].Summary}</div>`;
-            } else {
-              document.getElementById('summary-content').innerHTML = '<p>No summary available for this ticker.</p>';
-            }
-            document.getElementById('summary-popup').style.display = 'block';
-          });
+          // The table is already loaded (and kept current by events); no refetch
+          const data = dtData || {};
+          if (data.table && data.table[selectedIdx] && data.table[selectedIdx].Summary) {
+            document.getElementById('summary-content').innerHTML = `<div style='white-space:pre-line;'>${data.table[selectedIdx].Summary}</div>`;
+          } else {
+            document.getElementById('summary-content').innerHTML = '<p>No summary available for this ticker.</p>';
+          }
+          document.getElementById('summary-popup').style.display = 'block';
         };
             </script>
             </div>
-        {% if not details %}
+        {% if job_id %}
+            <div id="job-status" data-job="{{ job_id }}" data-symbol="{{ selected }}" style="margin-bottom:12px;color:#ffd700;">Fetching fresh data for {{ selected }}&hellip;</div>
+            <script>
+        (function pollJob() {
+          const el = document.getElementById('job-status');
+          fetch('/jobs/' + el.dataset.job).then(r => r.json()).then(job => {
+            if (job.status === 'done') {
+              window.location.href = '/home?symbol=' + encodeURIComponent(el.dataset.symbol);
+            } else if (job.status === 'error') {
+              el.innerText = 'Fetch failed: ' + job.error;
+            } else {
+              setTimeout(pollJob, 1000);
+            }
+          }).catch(() => setTimeout(pollJob, 2000));
+        })();
+            </script>
+        {% endif %}
+        {% if not details and not job_id %}
             <p>Select a ticker to view details.</p>
         {% endif %}
         {% if details %}
@@ -132,9 +205,9 @@ V6_TEMPLATE = '''
                         {% set items = details.items()|list %}
                         {% for i in range(0, items|length, 2) %}
                         <tr>
-                            <td class="key" style="color:#d4a200;font-weight:bold;">{{ items[i][0] }}</td><td style="color:#222;">{{ items[i][1] }}</td>
+                            <td class="key" style="color:#d4a200;font-weight:bold;">{{ items[i][0] }}</td><td style="color:#222;">{{ format_field(items[i][0], items[i][1]) }}</td>
                             {% if i+1 < items|length %}
-                                <td class="key" style="color:#d4a200;font-weight:bold;">{{ items[i+1][0] }}</td><td style="color:#222;">{{ items[i+1][1] }}</td>
+                                <td class="key" style="color:#d4a200;font-weight:bold;">{{ items[i+1][0] }}</td><td style="color:#222;">{{ format_field(items[i+1][0], items[i+1][1]) }}</td>
                             {% else %}
                                 <td></td><td></td>
                             {% endif %}
@@ -148,39 +221,57 @@ V6_TEMPLATE = '''
 </div>
 '''
 
+def extract_key_data(row):
+    key_data = {}
+    for field in OHLC_FIELDS + ["Date"]:
+        key_data[field] = row.get(field)
+    for k, v in row.items():
+        if k not in key_data:
+            key_data[k] = v
+    return key_data
+
+def list_tickers():
+    """Stored symbols (from the cached snapshot) plus new ones still queued in the store writer."""
+    snapshot = get_store().snapshot()
+    return snapshot.tickers + [s for s in get_writer().pending_symbols() if s not in snapshot.rows]
+
+def lookup(symbol):
+    """A symbol's row from the cached snapshot, with fields still queued in the store writer applied."""
+    row = get_store().snapshot().rows.get(symbol)
+    pending = get_writer().pending(symbol)
+    if pending is None:
+        return row
+    return dict(row or {"Symbol": symbol}, **pending)
+
+def _fetch_new_symbol(symbol):
+    """Job: summary + OHLC for a symbol the store has never seen."""
+    new_row = fetch_summary(symbol) or {"Symbol": symbol}
+    ohlc_data = fetch_ohlc_yfinance(symbol, update_db=False)
+    if ohlc_data:
+        new_row.update(ohlc_record(ohlc_data))
+    row = normalize_records([new_row])[0]
+    get_writer().upsert(symbol, row)
+    return row
+
+def _refresh_ohlc(symbol):
+    """Job: fresh OHLC for a stored symbol (queued for the store writer by update_db)."""
+    ohlc_data = fetch_ohlc_yfinance(symbol)
+    return ohlc_record(ohlc_data) if ohlc_data else None
+
 def get_v6_dashboard():
-    if not os.path.exists(CSV_FILE):
-        return f"CSV file '{CSV_FILE}' not found. Please run stock.py first."
-    df = pd.read_csv(CSV_FILE)
-    tickers = df["Symbol"].tolist() if "Symbol" in df.columns else []
+    writer = get_writer()
+    tickers = list_tickers()
+    if not tickers:
+        return f"No summary data in '{writer.store.path}'. Please run stock.py first."
     search = request.args.get("search", "").strip().upper()
     selected = request.args.get("symbol", None)
     details = None
-    def extract_key_data(row):
-        key_data = {}
-        for field in [
-            "Today High", "Today Low", "Today Open", "Today Close",
-            "Previous High", "Previous Low", "Previous Open", "Previous Close", "Date"
-        ]:
-            key_data[field] = row.get(field)
-        for k, v in row.items():
-            if k not in key_data:
-                key_data[k] = v
-        return key_data
-    if search:
-        if search not in tickers:
-            # fallback: just show tickers
-            pass
-        else:
-            details_row = df[df["Symbol"] == search]
-            if not details_row.empty:
-                row_dict = details_row.iloc[0].to_dict()
-                details = extract_key_data(row_dict)
-            selected = search
-    if selected and selected in tickers:
-        details_row = df[df["Symbol"] == selected]
-        if not details_row.empty:
-            details = extract_key_data(details_row.iloc[0].to_dict())
+    if search and lookup(search) is not None:
+        selected = search
+    if selected:
+        row = lookup(selected)
+        if row is not None:
+            details = extract_key_data(row)
     # Minimal v6 template for Home
     return render_template_string(V6_TEMPLATE, tickers=tickers, selected=selected, details=details, search=search)
 
@@ -201,6 +292,8 @@ def read_daytrading_csv():
     except Exception:
         return [], [], "", os.path.getmtime(csv_path)
     columns = df.columns.tolist()
+    # Empty cells become null rather than NaN, which is not valid JSON
+    df = df.astype(object).where(df.notna(), None)
     records = df.to_dict(orient="records")
     summary = df["Summary"].iloc[0] if "Summary" in df.columns and not df.empty else ""
     mtime = os.path.getmtime(csv_path)
@@ -208,92 +301,75 @@ def read_daytrading_csv():
 
 @app.route("/")
 def index():
-    if not os.path.exists(CSV_FILE):
-        return f"CSV file '{CSV_FILE}' not found. Please run stock.py first."
-    df = pd.read_csv(CSV_FILE)
-    tickers = df["Symbol"].tolist() if "Symbol" in df.columns else []
+    writer = get_writer()
+    tickers = list_tickers()
+    if not tickers:
+        return f"No summary data in '{writer.store.path}'. Please run stock.py first."
     search = request.args.get("search", "").strip().upper()
     selected = request.args.get("symbol", None)
     details = None
-    def extract_key_data(row):
-        key_data = {}
-        for field in [
-            "Today High", "Today Low", "Today Open", "Today Close",
-            "Previous High", "Previous Low", "Previous Open", "Previous Close", "Date"
-        ]:
-            key_data[field] = row.get(field)
-        for k, v in row.items():
-            if k not in key_data:
-                key_data[k] = v
-        return key_data
+    job = None
     if search:
-        if search not in tickers:
-            new_row = fetch_summary(search) or {"Symbol": search}
-            ohlc_data = fetch_ohlc_yfinance(search)
-            if ohlc_data:
-                new_row.update(ohlc_data)
-            df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-            df.to_csv(CSV_FILE, index=False)
-            df = pd.read_csv(CSV_FILE)
-            tickers = df["Symbol"].tolist() if "Symbol" in df.columns else []
-            selected = search
+        # Upstream fetches run as background jobs; the page renders what the store has now
+        row = lookup(search)
+        if row is None:
+            job = get_executor().submit("new_symbol", _fetch_new_symbol, search, symbol=search)
+            tickers.append(search)
         else:
-            details_row = df[df["Symbol"] == search]
-            if not details_row.empty:
-                row_dict = details_row.iloc[0].to_dict()
-                missing_fields = [
-                    f for f in [
-                        "Today High", "Today Low", "Today Open", "Today Close",
-                        "Previous High", "Previous Low", "Previous Open", "Previous Close"
-                    ] if row_dict.get(f) in [None, "", "None"] or pd.isna(row_dict.get(f))
-                ]
-                if missing_fields:
-                    ohlc_data = fetch_ohlc_yfinance(search)
-                    if ohlc_data:
-                        for k, v in ohlc_data.items():
-                            if v not in [None, "", "None"]:
-                                df.loc[df["Symbol"] == search, k] = v
-                        df.to_csv(CSV_FILE, index=False)
-                        df = pd.read_csv(CSV_FILE)
-            selected = search
-    if selected and selected in tickers:
-        details_row = df[df["Symbol"] == selected]
-        if not details_row.empty:
-            details = extract_key_data(details_row.iloc[0].to_dict())
-    return render_template_string(V6_TEMPLATE, tickers=tickers, selected=selected, details=details, search=search)
+            missing_fields = [
+                f for f in OHLC_FIELDS
+                if row.get(f) in [None, "", "None"] or pd.isna(row.get(f))
+            ]
+            if missing_fields:
+                job = get_executor().submit("ohlc", _refresh_ohlc, search, symbol=search)
+        selected = search
+    if selected:
+        row = lookup(selected)
+        if row is not None:
+            details = extract_key_data(row)
+    return render_template_string(V6_TEMPLATE, tickers=tickers, selected=selected, details=details, search=search,
+                                  job_id=job.id if job else None)
 
 @app.route("/fetch_ohlc", methods=["POST"])
 def fetch_ohlc():
     symbol = request.form.get("symbol")
     if not symbol:
         return "No symbol provided.", 400
-    df = pd.read_csv(CSV_FILE)
-    details_row = df[df["Symbol"] == symbol]
-    if not details_row.empty:
-        ohlc_data = fetch_ohlc_yfinance(symbol)
-        if ohlc_data:
-            for k, v in ohlc_data.items():
-                if v not in [None, "", "None"]:
-                    df.loc[df["Symbol"] == symbol, k] = v
-            df.to_csv(CSV_FILE, index=False)
-    df = pd.read_csv(CSV_FILE)
-    tickers = df["Symbol"].tolist() if "Symbol" in df.columns else []
-    details_row = df[df["Symbol"] == symbol]
-    details = None
-    if not details_row.empty:
-        def extract_key_data(row):
-            key_data = {}
-            for field in [
-                "Today High", "Today Low", "Today Open", "Today Close",
-                "Previous High", "Previous Low", "Previous Open", "Previous Close", "Date"
-            ]:
-                key_data[field] = row.get(field)
-            for k, v in row.items():
-                if k not in key_data:
-                    key_data[k] = v
-            return key_data
-        details = extract_key_data(details_row.iloc[0].to_dict())
-    return render_template_string(V6_TEMPLATE, tickers=tickers, selected=symbol, details=details, search=symbol)
+    row = lookup(symbol)
+    job = get_executor().submit("ohlc", _refresh_ohlc, symbol, symbol=symbol) if row is not None else None
+    tickers = list_tickers()
+    details = extract_key_data(row) if row is not None else None
+    return render_template_string(V6_TEMPLATE, tickers=tickers, selected=symbol, details=details, search=symbol,
+                                  job_id=job.id if job else None)
+
+@app.route('/jobs/stats')
+def job_stats():
+    """How many fetches were shared instead of repeated: per job kind and per upstream call."""
+    return jsonify({'jobs': get_executor().stats(), 'upstream': single_flight.stats()})
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Status of a background fetch; `result` is set once status is "done"."""
+    job = get_executor().get(job_id)
+    if job is None:
+        return jsonify({'id': job_id, 'status': 'unknown'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/intraday/<symbol>')
+def intraday_bars(symbol):
+    """Latest intraday bars for a symbol, read straight from its in-memory ring."""
+    symbol = symbol.strip().upper()
+    feed = get_feed()
+    if feed.watch([symbol]):
+        # First request for this symbol: fill its ring from the session open
+        feed.poll_once(symbols=[symbol])
+    # A copy, since the feed thread may be rewriting the newest bar meanwhile
+    window = feed.window(symbol, request.args.get("bars", 60, type=int), copy=True)
+    return jsonify({
+        'symbol': symbol,
+        'interval': feed.interval,
+        'bars': window_records(*window) if window else [],
+    })
 
 @app.route('/daytrading_data')
 def daytrading_data():
@@ -306,9 +382,53 @@ def daytrading_data():
         'updated_at': updated_at,
     })
 
+gpt2_proc = None
+gpt2_lock = threading.Lock()
+# A worker started elsewhere is reached with its GPT2_WORKER_AUTHKEY; one the viewer
+# launches gets a fresh secret, passed through its environment
+GPT2_AUTHKEY = os.environ.get('GPT2_WORKER_AUTHKEY') or secrets.token_bytes(32).hex()
+
+def _gpt2_generate(prompt):
+    """Generate on the persistent GPT-2 worker, starting it on first use."""
+    global gpt2_proc
+    authkey = GPT2_AUTHKEY.encode('utf-8')
+    try:
+        return generate_remote(prompt, authkey=authkey)
+    except (OSError, EOFError, AuthenticationError) as e:
+        # No worker yet, or it died mid-request: (re)start ours and retry once
+        print(f"GPT-2 worker unavailable ({type(e).__name__}: {e}); starting one")
+        with gpt2_lock:
+            if gpt2_proc is None or gpt2_proc.poll() is not None:
+                gpt2_proc = subprocess.Popen([sys.executable, 'run_local_gpt2_prompt.py', '--serve'],
+                                             env=dict(os.environ, GPT2_WORKER_AUTHKEY=GPT2_AUTHKEY))
+        if not wait_for_worker(authkey=authkey):
+            exited = gpt2_proc.poll()
+            raise RuntimeError("GPT-2 worker did not start" + (f" (exit code {exited})" if exited is not None else "")) from e
+        return generate_remote(prompt, authkey=authkey)
+
+def _stop_gpt2_worker():
+    """Stop the worker this viewer launched, so it does not keep the port and the model in memory."""
+    global gpt2_proc
+    if gpt2_proc and gpt2_proc.poll() is None:
+        gpt2_proc.terminate()
+        try:
+            gpt2_proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            gpt2_proc.kill()
+            gpt2_proc.wait()
+    gpt2_proc = None
+
+atexit.register(_stop_gpt2_worker)
+
 @app.route('/run_daytrading_assistant')
 def run_daytrading_assistant():
-    subprocess.run([sys.executable, 'run_local_gpt2_prompt.py'])
+    error = None
+    try:
+        run_assistant(_gpt2_generate, _dt_csv_path())
+        bus.wake()
+    except Exception as e:
+        error = str(e) or type(e).__name__
+        print(f"Day Trading Assistant run failed: {error}")
     cols, rows, summary, mtime = read_daytrading_csv()
     updated_at = int(mtime) if mtime else None
     return jsonify({
@@ -316,6 +436,7 @@ def run_daytrading_assistant():
         'table': rows,
         'summary': summary,
         'updated_at': updated_at,
+        'error': error,
     })
 
 @app.route('/download_daytrading_csv')
@@ -330,11 +451,47 @@ nmapv_proc = None
 def _nmapv_log_path():
     return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nmapv_run.log')
 
-def _read_nmapv_log():
+# Most log bytes returned at once; a first load (or a reader that fell behind) gets the newest ones
+NMAPV_TAIL_BYTES = 10000
+
+def _utf8_boundary(data, start=True):
+    """Bytes to drop from the start (start=True) or end of `data` so no UTF-8 character is cut."""
+    if start:
+        n = 0
+        while n < min(3, len(data)) and 0x80 <= data[n] < 0xC0:
+            n += 1
+        return n
+    for back in range(1, min(4, len(data)) + 1):
+        byte = data[-back]
+        if byte < 0x80:
+            return 0
+        if byte >= 0xC0:
+            needed = 2 if byte < 0xE0 else 3 if byte < 0xF0 else 4
+            return back if back < needed else 0
+    return 0
+
+def _read_nmapv_log(offset=None, max_bytes=NMAPV_TAIL_BYTES):
+    """
+    Log bytes from `offset` to the end, decoded, plus the offset to ask for
+    next time. Cost is proportional to the new output, not the file size.
+    Without an offset (first load), past the end (the log was truncated by
+    a new run) or more than `max_bytes` behind, it returns the newest
+    `max_bytes` with reset=True, meaning the caller should replace its text.
+    """
     path = _nmapv_log_path()
-    if not os.path.exists(path): return ''
-    with open(path, 'r', encoding='utf-8', errors='replace') as f:
-        return f.read()[-10000:]  # last 10k chars
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    reset = offset is None or offset > size or size - offset > max_bytes
+    start = max(0, size - max_bytes) if reset else offset
+    if start == size:
+        return '', size, reset
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(size - start)
+    head = _utf8_boundary(data) if reset and start else 0
+    # A character still being written is left for the next read
+    tail = _utf8_boundary(data, start=False)
+    data = data[head:len(data) - tail]
+    return data.decode('utf-8', errors='replace'), start + head + len(data), reset
 
 def _run_nmapv():
     global nmapv_proc
@@ -365,7 +522,7 @@ def _is_nmapv_running():
 # --- Flask routes for nmapv tool ---
 @app.route('/tools/nmapv')
 def tools_nmapv():
-    return render_template_string(NMAPV_TEMPLATE)
+    return render_template_string(NMAPV_TEMPLATE, tail_chars=NMAPV_TAIL_BYTES)
 
 @app.route('/tools/nmapv/run', methods=['POST'])
 def tools_nmapv_run():
@@ -377,14 +534,86 @@ def tools_nmapv_stop():
     ok = _stop_nmapv()
     return jsonify({'stopped': ok})
 
-# Route to serve nmapv log content
+# Route to tail the nmapv log: ?offset=N returns the output written since N
 @app.route('/tools/nmapv/log')
 def tools_nmapv_log():
     try:
-        log_content = _read_nmapv_log()
+        text, offset, reset = _read_nmapv_log(request.args.get('offset', type=int))
     except Exception as e:
-        log_content = f"Error reading log: {e}"
-    return log_content, 200, {'Content-Type': 'text/plain; charset=utf-8'}
+        return jsonify({'text': f"Error reading log: {e}", 'offset': None, 'reset': True})
+    return jsonify({'text': text, 'offset': offset, 'reset': reset})
+
+# --- Server-Sent Events ---
+_summary_seen = None
+_recommendations_seen = None
+_nmapv_log_seen = None
+
+def _summary_changes():
+    """Symbols added or changed since the last check, from the store version."""
+    global _summary_seen
+    snapshot = get_store().snapshot()
+    previous, _summary_seen = _summary_seen, snapshot
+    if previous is None or previous is snapshot:
+        return None
+    return {
+        'version': snapshot.version,
+        'added': [s for s in snapshot.tickers if s not in previous.rows],
+        'changed': [s for s, row in snapshot.rows.items() if s in previous.rows and previous.rows[s] != row],
+    }
+
+def _recommendation_changes():
+    """The recommendations table, whenever the CSV is rewritten."""
+    global _recommendations_seen
+    path = _dt_csv_path()
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    if mtime == _recommendations_seen:
+        return None
+    _recommendations_seen = mtime
+    cols, rows, summary, mtime = read_daytrading_csv()
+    return {'columns': cols, 'table': rows, 'summary': summary, 'updated_at': int(mtime) if mtime else None}
+
+def _nmapv_log_changes():
+    """A notice that the nmapv log was written to; each stream reads the new text from its own offset."""
+    global _nmapv_log_seen
+    path = _nmapv_log_path()
+    stat = os.stat(path) if os.path.exists(path) else None
+    seen = (stat.st_size, stat.st_mtime_ns) if stat else None
+    if seen == _nmapv_log_seen:
+        return None
+    _nmapv_log_seen = seen
+    return {'size': seen[0] if seen else 0}
+
+def _nmapv_log_tail(offset):
+    """Per-connection handler: the output since this client's offset (catching up when the stream opens)."""
+    state = {'offset': offset}
+
+    def handle(_notice):
+        text, next_offset, reset = _read_nmapv_log(state['offset'])
+        if not text and not reset and next_offset == state['offset']:
+            return None
+        state['offset'] = next_offset
+        return {'id': next_offset, 'offset': next_offset, 'text': text, 'reset': reset}
+    return handle
+
+bus.add_source('summary', _summary_changes)
+bus.add_source('recommendations', _recommendation_changes)
+bus.add_source('nmapv_log', _nmapv_log_changes)
+
+@app.route('/events')
+def events():
+    """
+    SSE stream; ?topics=a,b limits it to those event names. nmapv_log
+    events continue from ?offset= (the offset /tools/nmapv/log returned),
+    or from Last-Event-ID when the browser reconnects.
+    """
+    topics = [t for t in request.args.get('topics', '').split(',') if t]
+    handlers = {}
+    if not topics or 'nmapv_log' in topics:
+        last_id = request.headers.get('Last-Event-ID', '')
+        offset = int(last_id) if last_id.isdigit() else request.args.get('offset', type=int)
+        handlers['nmapv_log'] = _nmapv_log_tail(offset)
+    return Response(bus.stream(bus.subscribe(topics, handlers)), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 NMAPV_TEMPLATE = '''
     <nav style="background:#222;padding:12px 24px;display:flex;align-items:center;gap:32px;border-radius:8px 8px 0 0;">
@@ -409,18 +638,11 @@ NMAPV_TEMPLATE = '''
 </div>
 <script>
 let nmapvRunning = false;
-let logTimer = null;
 function runNmapv(){
     fetch('/tools/nmapv/run',{method:'POST'}).then(r=>r.json()).then(d=>{
         nmapvRunning = d.running;
         document.getElementById('run-btn').disabled = nmapvRunning;
         document.getElementById('stop-btn').disabled = !nmapvRunning;
-        logTimer = setInterval(()=>{
-            fetch('/tools/nmapv/log').then(r=>r.text()).then(txt=>{
-                document.getElementById('nmapv-log').innerText = txt;
-                window.scrollTo(0,document.body.scrollHeight);
-            });
-        },1000);
     });
 }
 function stopNmapv(){
@@ -428,9 +650,27 @@ function stopNmapv(){
         nmapvRunning = !d.stopped;
         document.getElementById('run-btn').disabled = nmapvRunning;
         document.getElementById('stop-btn').disabled = !nmapvRunning;
-        clearInterval(logTimer);
     });
 }
+// The log's tail once, then only the new output as the server pushes it
+// Only the newest output is kept, like the server-side tail
+const LOG_TAIL_CHARS = {{ tail_chars }};
+let logText = '';
+function showLog(text, reset){
+    logText = reset ? text : logText + text;
+    if (logText.length > LOG_TAIL_CHARS) logText = logText.slice(-LOG_TAIL_CHARS);
+    document.getElementById('nmapv-log').innerText = logText;
+}
+fetch('/tools/nmapv/log').then(r=>r.json()).then(chunk=>{
+    showLog(chunk.text, true);
+    // Stream from where the fetch above ended, so nothing is lost or repeated in between
+    const events = new EventSource('/events?topics=nmapv_log&offset=' + (chunk.offset ?? ''));
+    events.addEventListener('nmapv_log', e=>{
+        const chunk = JSON.parse(e.data);
+        showLog(chunk.text, chunk.reset);
+        window.scrollTo(0,document.body.scrollHeight);
+    });
+});
 </script>
 '''
 
@@ -0,0 +1,156 @@
+"""
+Typed normalization of Nasdaq summary and OHLC fields.
+
+The API returns display strings ("$1,234.56", "12,345,678", "1.2T",
+"0.78%", "$238.48/$227.02"). normalize_frame() converts the known fields
+to float64 / Int64 / datetime64 columns in one vectorized pass so screens
+and sorts run on arrays; format_field() turns values back into display
+strings and is only used when rendering.
+"""
+import math
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List
+
+import pandas as pd
+
+# Prices and per-share amounts (float64, rendered as $x,xxx.xx)
+CURRENCY_FIELDS = [
+    "OneYrTarget", "PreviousClose", "EarningsPerShare", "AnnualizedDividend",
+    "Today High", "Today Low", "Today Open", "Today Close",
+    "Previous High", "Previous Low", "Previous Open", "Previous Close",
+]
+# Counts (Int64, rendered with thousands separators)
+INTEGER_FIELDS = ["ShareVolume", "AverageVolume", "MarketCap"]
+# Plain ratios (float64)
+FLOAT_FIELDS = ["PERatio", "ForwardPE1Yr", "Beta"]
+# Percentages (float64 in percent units, rendered as x.xx%)
+PERCENT_FIELDS = ["Yield"]
+# Dates (datetime64, rendered as YYYY-MM-DD); API dates are MM/DD/YYYY
+DATE_FIELDS = ["ExDividendDate", "DividendPaymentDate", "Date"]
+# "$high/$low" pairs split into <prefix>High / <prefix>Low currency columns
+RANGE_FIELDS = {"TodayHighLow": "Today", "FiftTwoWeekHighLow": "FiftTwoWeek"}
+
+RANGE_COLUMNS = [f"{prefix}{side}" for prefix in RANGE_FIELDS.values() for side in ("High", "Low")]
+
+# Canonical column order: Symbol, the summary fields in API order, then OHLC
+KNOWN_COLUMNS = [
+    "Symbol", "Exchange", "Sector", "Industry", "OneYrTarget", "TodayHigh", "TodayLow",
+    "ShareVolume", "AverageVolume", "PreviousClose", "FiftTwoWeekHigh", "FiftTwoWeekLow",
+    "MarketCap", "PERatio", "ForwardPE1Yr", "EarningsPerShare", "AnnualizedDividend",
+    "ExDividendDate", "DividendPaymentDate", "Yield", "Beta",
+    "Today High", "Today Low", "Today Open", "Today Close",
+    "Previous High", "Previous Low", "Previous Open", "Previous Close", "Date",
+]
+
+_NUMBER = r"^\s*(-?\d*\.?\d+)\s*([KMBT]?)\s*%?\s*$"
+_SUFFIX = {"": 1.0, "K": 1e3, "M": 1e6, "B": 1e9, "T": 1e12}
+
+
+def column_order(names: Iterable[str]) -> List[str]:
+    """Stable column order for any union of fields: known columns first, then the rest sorted."""
+    names = set(names)
+    rank = {name: i for i, name in enumerate(KNOWN_COLUMNS)}
+    return sorted(names, key=lambda n: (rank.get(n, len(rank)), n))
+
+
+def parse_numeric(values: pd.Series) -> pd.Series:
+    """Vectorized parse of display numbers ("$1,234.56", "1.2T", "0.78%") to float64."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype("float64")
+    text = values.astype("string").str.upper().str.replace(r"[$,\s]", "", regex=True)
+    parts = text.str.extract(_NUMBER)
+    number = pd.to_numeric(parts[0], errors="coerce")
+    scale = parts[1].map(_SUFFIX).astype("float64")
+    # Values that were already numbers (mixed object columns) pass through
+    direct = pd.to_numeric(values, errors="coerce")
+    return (number * scale).fillna(direct).astype("float64")
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """Parse MM/DD/YYYY (API) or YYYY-MM-DD (stored) dates to datetime64."""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    text = values.astype("string")
+    us = pd.to_datetime(text, format="%m/%d/%Y", errors="coerce")
+    iso = pd.to_datetime(text.str.slice(0, 10), format="%Y-%m-%d", errors="coerce")
+    return us.fillna(iso)
+
+
+def normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Return a copy of `df` with every known field converted to its typed column."""
+    out = df.copy()
+    for field, prefix in RANGE_FIELDS.items():
+        if field in out.columns:
+            pair = out[field].astype("string").str.split("/", n=1, expand=True)
+            if pair.shape[1] == 2:
+                out[f"{prefix}High"] = parse_numeric(pair[0])
+                out[f"{prefix}Low"] = parse_numeric(pair[1])
+            out = out.drop(columns=[field])
+    # Range columns arrive on their own from an exported CSV
+    for field in CURRENCY_FIELDS + RANGE_COLUMNS + FLOAT_FIELDS + PERCENT_FIELDS:
+        if field in out.columns:
+            out[field] = parse_numeric(out[field])
+    for field in INTEGER_FIELDS:
+        if field in out.columns:
+            out[field] = parse_numeric(out[field]).round().astype("Int64")
+    for field in DATE_FIELDS:
+        if field in out.columns:
+            out[field] = parse_dates(out[field])
+    return out
+
+
+def to_records(df: pd.DataFrame, keep_empty: bool = False) -> List[Dict]:
+    """
+    Typed frame -> JSON-safe row dicts (dates as ISO strings). NaN/NaT
+    are dropped, or kept as None with `keep_empty` (for diffing full
+    snapshots, where a field going to "N/A" is a change).
+    """
+    records = []
+    for row in df.to_dict(orient="records"):
+        clean = {}
+        for k, v in row.items():
+            if v is None or v is pd.NA or v is pd.NaT or (isinstance(v, float) and math.isnan(v)):
+                if keep_empty:
+                    clean[k] = None
+                continue
+            if isinstance(v, pd.Timestamp):
+                v = v.date().isoformat()
+            elif hasattr(v, "item"):
+                v = v.item()  # numpy scalar -> Python int/float
+            clean[k] = v
+        records.append(clean)
+    return records
+
+
+def normalize_records(rows: Iterable[Dict], keep_empty: bool = False) -> List[Dict]:
+    """Normalize a batch of raw row dicts in one vectorized pass."""
+    rows = list(rows)
+    if not rows:
+        return []
+    return to_records(normalize_frame(pd.DataFrame(rows)), keep_empty=keep_empty)
+
+
+def iter_normalized(rows: Iterable[Dict], chunk_size: int = 1000, keep_empty: bool = False) -> Iterator[Dict]:
+    """Normalize a stream of rows chunk by chunk, keeping memory bounded."""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield from normalize_records(chunk, keep_empty=keep_empty)
+
+
+def format_field(field: str, value) -> str:
+    """Render a typed value for display; unknown fields are shown as-is."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    try:
+        if field in CURRENCY_FIELDS or field in RANGE_COLUMNS:
+            return f"${float(value):,.2f}"
+        if field in INTEGER_FIELDS:
+            return f"{int(value):,}"
+        if field in PERCENT_FIELDS:
+            return f"{float(value):.2f}%"
+    except (TypeError, ValueError):
+        pass
+    return str(value)
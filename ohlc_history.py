@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Incremental local store of daily OHLCV bars per symbol.
+
+Each symbol records the date range already covered. A refresh only asks
+the data source for what is missing: older days when the lookback grows,
+and the days since the last refresh. Bars for past sessions are final and
+never fetched again; only the current session's bar is provisional and
+gets replaced until the session is over.
+
+    python ohlc_history.py refresh --days 365 AAPL MSFT
+    python ohlc_history.py show AAPL
+"""
+import argparse
+import os
+import sqlite3
+import threading
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from market_data import get_provider
+from trading_calendar import exchange_now, is_trading_day, settled_through
+
+HISTORY_FILE = os.environ.get(
+    "OHLC_HISTORY_STORE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "ohlc_history.db")
+)
+BAR_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+class HistoryStore:
+    """
+    Daily bars keyed by (symbol, date) in SQLite, plus the covered range
+    per symbol. `fetch(symbols, start, end)` returns {symbol: DataFrame}
+    of bars in [start, end) and defaults to the market data provider. A
+    symbol left out of the result was not fetched (batched downloads hide
+    per-symbol failures), so its range stays uncovered and is asked for
+    again; an empty frame means the source has no bars there.
+    """
+
+    def __init__(self, path: str = HISTORY_FILE, fetch: Callable = None):
+        self.path = path
+        self.fetch = fetch or get_provider().get_bars
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS bars (symbol TEXT NOT NULL, date TEXT NOT NULL,"
+            " open REAL, high REAL, low REAL, close REAL, volume REAL, final INTEGER NOT NULL,"
+            " PRIMARY KEY (symbol, date)) WITHOUT ROWID"
+        )
+        # [start, end] is known: every session in it is stored as a final bar (or had none)
+        conn.execute("CREATE TABLE IF NOT EXISTS coverage (symbol TEXT PRIMARY KEY, start TEXT NOT NULL, end TEXT NOT NULL)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def coverage(self, symbol: str) -> Optional[Tuple[date, date]]:
+        row = self._conn().execute("SELECT start, end FROM coverage WHERE symbol = ?", (symbol,)).fetchone()
+        return (date.fromisoformat(row[0]), date.fromisoformat(row[1])) if row else None
+
+    def symbols(self) -> List[str]:
+        """Every symbol with a covered range."""
+        return [r[0] for r in self._conn().execute("SELECT symbol FROM coverage ORDER BY symbol")]
+
+    def missing_ranges(self, symbol: str, start: date, today: date) -> List[Tuple[date, date]]:
+        """Half-open [from, to) ranges still needed to cover start..today."""
+        covered = self.coverage(symbol)
+        if covered is None:
+            return [(start, today + timedelta(days=1))]
+        ranges = []
+        if start < covered[0]:
+            ranges.append((start, covered[0]))
+        # Includes today until its session is over and the day is covered
+        tail = max(start, covered[1] + timedelta(days=1))
+        if tail <= today:
+            ranges.append((tail, today + timedelta(days=1)))
+        return ranges
+
+    def refresh(self, symbols: List[str], lookback_days: int = 365, today: date = None) -> int:
+        """
+        Bring every symbol up to date for the last `lookback_days` days,
+        grouping symbols that need the same range into one request.
+        Returns the number of bars written.
+        """
+        now = exchange_now()
+        today = today or now.date()
+        # Bars up to `settled` are final: past days, plus today once the close has passed
+        settled = settled_through(now) if today == now.date() else today - timedelta(days=1)
+        start = today - timedelta(days=lookback_days)
+        groups: Dict[Tuple[date, date], List[str]] = {}
+        for symbol in dict.fromkeys(symbols):
+            for rng in self.missing_ranges(symbol, start, today):
+                groups.setdefault(rng, []).append(symbol)
+        written = 0
+        for (lo, hi), group in groups.items():
+            try:
+                frames = self.fetch(group, lo, hi)
+            except Exception as e:
+                print(f"History fetch {lo}..{hi} for {len(group)} symbols failed: {e}")
+                continue
+            for symbol in group:
+                written += self._write(symbol, frames.get(symbol), lo, hi, settled)
+        return written
+
+    def _write(self, symbol: str, frame: Optional[pd.DataFrame], lo: date, hi: date, settled: date) -> int:
+        rows = []
+        if frame is not None and not frame.empty:
+            for ts, bar in frame[BAR_COLUMNS].iterrows():
+                day = ts.date()
+                rows.append((symbol, day.isoformat(), float(bar["Open"]), float(bar["High"]), float(bar["Low"]),
+                             float(bar["Close"]), float(bar["Volume"]), int(day <= settled)))
+        conn = self._conn()
+        with conn:
+            # Final bars are immutable; provisional ones are replaced by newer data
+            conn.executemany(
+                "INSERT INTO bars (symbol, date, open, high, low, close, volume, final) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(symbol, date) DO UPDATE SET open = excluded.open, high = excluded.high,"
+                " low = excluded.low, close = excluded.close, volume = excluded.volume, final = excluded.final"
+                " WHERE bars.final = 0",
+                rows,
+            )
+            # Everything up to the settled date in the fetched range is now known for good,
+            # as far as the source actually answered for this symbol
+            known_end = min(hi - timedelta(days=1), settled)
+            if rows:
+                # Sessions after the last bar returned may just be late; ask for them again
+                last = max(date.fromisoformat(row[1]) for row in rows)
+                if _has_session(last + timedelta(days=1), known_end):
+                    known_end = last
+            elif frame is None and _has_session(lo, known_end):
+                return 0
+            if known_end < lo:
+                return len(rows)
+            covered = self.coverage(symbol)
+            if covered is None or lo > covered[1] + timedelta(days=1):
+                new_start, new_end = lo, known_end  # nothing contiguous to extend
+            else:
+                new_start, new_end = min(lo, covered[0]), max(known_end, covered[1])
+            conn.execute(
+                "INSERT OR REPLACE INTO coverage (symbol, start, end) VALUES (?, ?, ?)",
+                (symbol, new_start.isoformat(), new_end.isoformat()),
+            )
+        return len(rows)
+
+    def bars(self, symbol: str, start: date = None, end: date = None) -> pd.DataFrame:
+        """Stored bars for one symbol between start and end (inclusive), indexed by date."""
+        query = "SELECT date, open, high, low, close, volume FROM bars WHERE symbol = ?"
+        params = [symbol]
+        if start:
+            query += " AND date >= ?"
+            params.append(start.isoformat())
+        if end:
+            query += " AND date <= ?"
+            params.append(end.isoformat())
+        frame = pd.DataFrame(self._conn().execute(query + " ORDER BY date", params).fetchall(),
+                             columns=["Date"] + BAR_COLUMNS)
+        frame["Date"] = pd.to_datetime(frame["Date"])
+        return frame.set_index("Date")
+
+    def all_bars(self, start: date = None) -> pd.DataFrame:
+        """Every stored bar as one long frame (Symbol, Date, OHLCV), sorted by symbol then date."""
+        query = "SELECT symbol, date, open, high, low, close, volume FROM bars"
+        params = []
+        if start:
+            query += " WHERE date >= ?"
+            params.append(start.isoformat())
+        frame = pd.DataFrame(self._conn().execute(query + " ORDER BY symbol, date", params).fetchall(),
+                             columns=["Symbol", "Date"] + BAR_COLUMNS)
+        frame["Date"] = pd.to_datetime(frame["Date"])
+        return frame
+
+
+def _has_session(first: date, last: date) -> bool:
+    """True if any trading session falls in [first, last]."""
+    day = first
+    while day <= last:
+        if is_trading_day(day):
+            return True
+        day += timedelta(days=1)
+    return False
+
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def get_history() -> HistoryStore:
+    """Return the process-wide history store at HISTORY_FILE."""
+    global _history
+    if _history is None:
+        with _history_lock:
+            if _history is None:
+                _history = HistoryStore(HISTORY_FILE)
+    return _history
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental daily OHLCV history store")
+    parser.add_argument("action", choices=["refresh", "show"])
+    parser.add_argument("symbols", nargs="*", help="Symbols (default for refresh: every symbol in --file)")
+    parser.add_argument("--file", default="tickers.csv", help="CSV with a Symbol column (default: tickers.csv)")
+    parser.add_argument("--days", type=int, default=365, help="Lookback in calendar days (default: 365)")
+    args = parser.parse_args()
+
+    history = get_history()
+    if args.action == "refresh":
+        symbols = args.symbols or pd.read_csv(args.file)["Symbol"].tolist()
+        print(f"Wrote {history.refresh(symbols, lookback_days=args.days)} bars for {len(symbols)} symbols")
+    else:
+        for symbol in args.symbols:
+            print(symbol)
+            print(history.bars(symbol).tail(20))
@@ -0,0 +1,235 @@
+import asyncio
+import heapq
+import itertools
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket shared by all fetch workers.
+    rate: tokens added per second (sustained requests/sec)
+    burst: bucket capacity (max requests allowed back to back)
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = float(rate)
+        self.capacity = max(float(burst), 1.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+        self._async_lock = None  # created on first async use, inside the running loop
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+
+    def _try_take(self, tokens: float) -> float:
+        """Consume `tokens` if available; otherwise return seconds to wait."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def _reserve(self, tokens: float) -> float:
+        """Consume `tokens` now, going into debt if needed; return seconds until the debt is repaid."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until `tokens` are available, then consume them."""
+        while True:
+            wait = self._try_take(tokens)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: float = 1.0):
+        """
+        Like acquire(), but yields to the event loop while waiting. Waiters
+        queue on an asyncio.Lock, so only the one at the front sleeps for
+        the next token instead of all of them waking for it. That one
+        reserves its token before sleeping, so time the event loop oversleeps
+        counts towards the next token instead of being lost.
+        """
+        if self._async_lock is None:
+            self._async_lock = asyncio.Lock()
+        async with self._async_lock:
+            wait = self._reserve(tokens)
+            if wait:
+                await asyncio.sleep(wait)
+
+
+def is_throttled(status) -> bool:
+    """Upstream pushback: 429/403, any 5xx, or no response at all (None)."""
+    return status is None or status in (403, 429) or status >= 500
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Full-jitter exponential backoff for the given retry attempt (0-based)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class AdaptiveLimiter:
+    """
+    AIMD control of request rate and concurrency.
+    Every healthy response adds `rate_step / rate` req/s (about +rate_step
+    per second) and one slot of concurrency per full window of successes;
+    a throttled response multiplies both by `decrease`, at most once per
+    `cooldown` seconds so one burst of errors only backs off once.
+    Call acquire() before a request and release(status) after it.
+    """
+
+    def __init__(self, rate: float, max_rate: float = None, min_rate: float = 0.1,
+                 max_concurrency: int = 1, burst: float = 1.0, rate_step: float = 1.0,
+                 decrease: float = 0.5, cooldown: float = 1.0):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_rate = max(rate, max_rate or rate)
+        self.min_rate = min(min_rate, rate)
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = 1
+        self.rate_step = rate_step
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.throttled = 0
+        self._window = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+        self._async_waiters = []  # (loop, future) of coroutines waiting for a slot
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    def _try_enter(self, waiter=None) -> bool:
+        """Take a slot if one is free; otherwise park `waiter` until release()."""
+        with self._cond:
+            if self.in_flight < self.limit:
+                self.in_flight += 1
+                return True
+            if waiter is not None:
+                self._async_waiters.append(waiter)
+            return False
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+        self.bucket.acquire()
+
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            waiter = loop.create_future()
+            if self._try_enter((loop, waiter)):
+                break
+            await waiter
+        await self.bucket.acquire_async()
+
+    def release(self, status):
+        with self._cond:
+            self.in_flight -= 1
+            if is_throttled(status):
+                self._on_throttled()
+            elif status is not None and status < 400:
+                self._on_success()
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(_wake, waiter)
+
+    def _on_success(self):
+        rate = self.bucket.rate
+        if rate < self.max_rate:
+            self.bucket.set_rate(min(self.max_rate, rate + self.rate_step / rate))
+        self._window += 1
+        if self._window >= self.limit:
+            self._window = 0
+            self.limit = min(self.max_concurrency, self.limit + 1)
+
+    def _on_throttled(self):
+        self.throttled += 1
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self._window = 0
+        self.bucket.set_rate(max(self.min_rate, self.bucket.rate * self.decrease))
+        self.limit = max(1, int(self.limit * self.decrease))
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class RetryQueue:
+    """
+    Work queue of symbols with a delayed retry heap, shared by worker threads.
+    get() hands out fresh symbols first-come, or retries whose jittered
+    backoff has elapsed; it returns None once nothing is pending, nothing
+    is waiting to be retried and no worker is still busy.
+    """
+
+    def __init__(self, items, max_attempts: int = 5, base_delay: float = 1.0, max_delay: float = 60.0):
+        self._fresh = iter(items)
+        self._retries = []
+        self._seq = itertools.count()
+        self._busy = 0
+        self._closed = False
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._cond = threading.Condition()
+
+    def get(self):
+        """Return (item, attempt) or None when the queue is drained."""
+        with self._cond:
+            while True:
+                if self._closed:
+                    return None
+                now = time.monotonic()
+                if self._retries and self._retries[0][0] <= now:
+                    _, _, item, attempt = heapq.heappop(self._retries)
+                    break
+                item = next(self._fresh, None)
+                if item is not None:
+                    attempt = 0
+                    break
+                if not self._retries and not self._busy:
+                    self._cond.notify_all()
+                    return None
+                self._cond.wait(self._retries[0][0] - now if self._retries else None)
+            self._busy += 1
+            return item, attempt
+
+    def done(self, item, attempt: int, retry: bool = False) -> bool:
+        """Finish an item; re-queue it with backoff if `retry` and attempts remain."""
+        with self._cond:
+            self._busy -= 1
+            requeued = retry and attempt + 1 < self.max_attempts
+            if requeued:
+                ready = time.monotonic() + backoff_delay(attempt, self.base_delay, self.max_delay)
+                heapq.heappush(self._retries, (ready, next(self._seq), item, attempt + 1))
+            self._cond.notify_all()
+            return requeued
+
+    def close(self):
+        """Stop handing out work (e.g. on Ctrl+C)."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
@@ -0,0 +1,143 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+
+class CacheEntry(NamedTuple):
+    value: Dict
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+
+class ResponseCache:
+    """
+    Persistent response cache backed by a single SQLite file.
+    Entries are fresh for `ttl` seconds; stale entries are kept (up to
+    `max_entries`, least recently used evicted first) so the caller can
+    revalidate them with If-None-Match / If-Modified-Since.
+    Safe to share between threads: each thread gets its own connection.
+    Reads do not write: access times are collected in memory and saved
+    with the next put/touch (or once `touch_batch` have piled up), and the
+    row count is tracked in memory, only recounted when it looks full.
+    """
+
+    def __init__(self, path: str, ttl: float = 300.0, max_entries: int = 20000, touch_batch: int = 256):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.touch_batch = touch_batch
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._accessed: Dict[str, float] = {}  # key -> access time not yet saved
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, etag TEXT, last_modified TEXT,"
+            " fetched_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        conn.commit()
+        self._count = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry for `key` (fresh or stale) and mark it recently used."""
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, etag, last_modified, fetched_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        with self._lock:
+            self._accessed[key] = time.time()
+            flush = len(self._accessed) >= self.touch_batch
+        if flush:
+            self._save_accessed(conn)
+            conn.commit()
+        return CacheEntry(json.loads(row[0]), row[1], row[2], row[3])
+
+    def _save_accessed(self, conn: sqlite3.Connection):
+        """Write the collected access times (part of the caller's transaction)."""
+        with self._lock:
+            accessed, self._accessed = self._accessed, {}
+        if accessed:
+            conn.executemany(
+                "UPDATE responses SET accessed_at = MAX(accessed_at, ?) WHERE key = ?",
+                [(at, key) for key, at in accessed.items()],
+            )
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return time.time() - entry.fetched_at < self.ttl
+
+    def put(self, key: str, value: Dict, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        now = time.time()
+        conn = self._conn()
+        updated = conn.execute(
+            "UPDATE responses SET value = ?, etag = ?, last_modified = ?, fetched_at = ?, accessed_at = ? WHERE key = ?",
+            (json.dumps(value), etag, last_modified, now, now, key),
+        ).rowcount
+        if not updated:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, etag, last_modified, fetched_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, json.dumps(value), etag, last_modified, now, now),
+            )
+            with self._lock:
+                self._count += 1
+        self._save_accessed(conn)
+        self._evict(conn)
+        conn.commit()
+
+    def touch(self, key: str):
+        """Mark a revalidated (304) entry fresh again."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+        self._save_accessed(conn)
+        conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection):
+        with self._lock:
+            if self._count <= self.max_entries:
+                return
+        # Other processes may share the file, so recount before deleting anything
+        count = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM responses WHERE key IN"
+                " (SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,),
+            )
+            count = self.max_entries
+        with self._lock:
+            self._count = count
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM responses")
+        conn.commit()
+        with self._lock:
+            self._count = 0
+            self._accessed.clear()
+
+
+def conditional_headers(entry: Optional[CacheEntry]) -> Dict[str, str]:
+    """Revalidation headers for a stale entry, if upstream gave us validators."""
+    headers = {}
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+    return headers
@@ -1,14 +1,26 @@
+import argparse
 import csv
 import logging
 import os
 import re
+import threading
+import time
 from datetime import datetime
-from typing import List, Dict, Tuple
-from transformers import pipeline
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from typing import Callable, List, Dict, Tuple
 
 
 LOG_FILE = "day_trading_assistant.log"
 CSV_FILE = "day_trading_recommendation.csv"
+MODEL = os.environ.get("GPT2_MODEL", "gpt2")
+# Local address of the persistent model worker (python run_local_gpt2_prompt.py --serve)
+WORKER_HOST = os.environ.get("GPT2_WORKER_HOST", "127.0.0.1")
+WORKER_PORT = int(os.environ.get("GPT2_WORKER_PORT", "6010"))
+# Shared secret for the worker connection. There is deliberately no default: the
+# worker unpickles what clients send, so the key is all that keeps other local
+# users out. The viewer generates one per worker it launches.
+WORKER_AUTHKEY = os.environ.get("GPT2_WORKER_AUTHKEY", "").encode("utf-8") or None
 
 
 def setup_logging() -> None:
@@ -22,10 +34,26 @@ def setup_logging() -> None:
     )
 
 
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def get_generator():
+    """Load the text-generation pipeline once per process (transformers is imported here, not at startup)."""
+    global _generator
+    if _generator is None:
+        with _generator_lock:
+            if _generator is None:
+                from transformers import pipeline
+
+                logging.info("Loading GPT-2 pipeline…")
+                _generator = pipeline("text-generation", model=MODEL)
+    return _generator
+
+
 def run_local_gpt2_prompt(prompt: str, max_new_tokens: int = 256) -> str:
     """Run a prompt using a local GPT-2 model and return the generated text."""
-    logging.info("Loading GPT-2 pipeline…")
-    generator = pipeline("text-generation", model="gpt2")
+    generator = get_generator()
     logging.info("Generating text…")
     # Use generation settings that tend to be more coherent
     result = generator(
@@ -129,9 +157,10 @@ def write_csv(rows: List[Dict[str, str]], summary: str, out_path: str = CSV_FILE
     return out_path
 
 
-def build_prompt() -> str:
+def build_prompt(market_context: str = "") -> str:
     # Keep user's structure but add a compact, explicit schema with one tiny example
-    return (
+    context = f"Current indicators (from stored daily bars):\n{market_context}\n\n" if market_context else ""
+    return context + (
         "You are my professional day trading assistant.\n"
         "Your goal is to output concrete intraday trade setups.\n\n"
         "Required output keys per idea (use exactly these labels):\n"
@@ -145,17 +174,110 @@ def build_prompt() -> str:
     )
 
 
-if __name__ == "__main__":
-    setup_logging()
-    logging.info("Starting Day Trading Assistant run…")
+def _warm_up():
+    try:
+        get_generator()
+    except Exception:
+        logging.exception("Loading the model failed; requests will retry it")
+
+
+def serve(host: str = WORKER_HOST, port: int = WORKER_PORT, authkey: bytes = WORKER_AUTHKEY) -> None:
+    """
+    Persistent model worker: load the model once, then answer generation
+    requests ({"prompt", "max_new_tokens"} -> {"text"} or {"error"}) on a
+    local socket. Connections are handled concurrently; generation is one
+    at a time, since the pipeline is not thread-safe.
+    """
+    if not authkey:
+        raise ValueError("GPT2_WORKER_AUTHKEY must be set to a secret for the worker")
+    generate_lock = threading.Lock()
+
+    def handle(conn):
+        with conn:
+            try:
+                while True:
+                    request = conn.recv()
+                    try:
+                        with generate_lock:
+                            text = run_local_gpt2_prompt(request["prompt"], request.get("max_new_tokens", 256))
+                        conn.send({"text": text})
+                    except Exception as e:
+                        logging.exception("Generation failed")
+                        conn.send({"error": str(e)})
+            except EOFError:
+                pass
 
-    prompt = build_prompt()
-    generated = run_local_gpt2_prompt(prompt)
+    with Listener((host, port), authkey=authkey) as listener:
+        logging.info("GPT-2 worker listening on %s:%d", host, port)
+        # Accept connections while the weights load; early requests wait for them
+        threading.Thread(target=_warm_up, name="gpt2-load", daemon=True).start()
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                logging.warning("Rejected worker connection: %s", e)
+                continue
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+
+def generate_remote(prompt: str, max_new_tokens: int = 256, host: str = WORKER_HOST, port: int = WORKER_PORT,
+                    authkey: bytes = WORKER_AUTHKEY) -> str:
+    """Generate through a running worker (see serve()); raises ConnectionRefusedError if none is listening."""
+    if not authkey:
+        raise ValueError("GPT2_WORKER_AUTHKEY must be set to the worker's secret")
+    with Client((host, port), authkey=authkey) as conn:
+        conn.send({"prompt": prompt, "max_new_tokens": max_new_tokens})
+        reply = conn.recv()
+    if "error" in reply:
+        raise RuntimeError(f"GPT-2 worker: {reply['error']}")
+    return reply["text"]
+
+
+def wait_for_worker(timeout: float = 30.0, host: str = WORKER_HOST, port: int = WORKER_PORT,
+                    authkey: bytes = WORKER_AUTHKEY) -> bool:
+    """Poll until a worker accepts connections with `authkey`; True once one does."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            Client((host, port), authkey=authkey).close()
+            return True
+        except (OSError, EOFError, AuthenticationError):
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.2)
+
+
+def run_assistant(generate: Callable[[str], str] = run_local_gpt2_prompt, out_path: str = CSV_FILE) -> str:
+    """Build the prompt from stored indicators, generate, and write the recommendations CSV."""
+    try:
+        from indicators import get_engine, prompt_context
+        market_context = prompt_context(get_engine().snapshot())
+    except Exception as e:
+        logging.warning("No indicator context: %s", e)
+        market_context = ""
+    prompt = build_prompt(market_context)
+    generated = generate(prompt)
     # Print to stdout for interactive runs and logs
     print(generated)
 
     rows, summary = parse_recommendations(generated)
     if not rows:
         logging.warning("Parser found no structured rows; writing summary-only CSV.")
-    out_path = write_csv(rows, summary, CSV_FILE)
-    logging.info("Done. CSV at: %s", os.path.abspath(out_path))
+    return write_csv(rows, summary, out_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Day Trading Assistant on a local GPT-2 model")
+    parser.add_argument("--serve", action="store_true", help="Run the persistent model worker instead of a single run")
+    parser.add_argument("--worker", action="store_true", help="Generate through a running worker instead of loading the model")
+    args = parser.parse_args()
+    if (args.serve or args.worker) and not WORKER_AUTHKEY:
+        parser.error("set GPT2_WORKER_AUTHKEY to a secret shared by the worker and its clients")
+
+    setup_logging()
+    if args.serve:
+        serve()
+    else:
+        logging.info("Starting Day Trading Assistant run…")
+        out_path = run_assistant(generate_remote if args.worker else run_local_gpt2_prompt)
+        logging.info("Done. CSV at: %s", os.path.abspath(out_path))
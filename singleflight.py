@@ -0,0 +1,76 @@
+"""
+Single-flight call coalescing.
+
+Callers asking for the same (operation, symbol) while a call for it is in
+flight wait for that call and share its result (or exception) instead of
+hitting upstream again. Nothing is cached once the call returns; that is
+the job of the quote and response caches.
+
+    row = single_flight.do(("summary", "AAPL"), fetch, "AAPL")
+    single_flight.stats()  # {"summary": {"calls": 12, "deduplicated": 11}}
+"""
+import threading
+from typing import Callable, Dict, Hashable
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """In-flight calls by key; the first element of a tuple key names the operation in stats()."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, key: Hashable, deduplicated: bool):
+        operation = str(key[0] if isinstance(key, tuple) else key)
+        counts = self._counts.setdefault(operation, {"calls": 0, "deduplicated": 0})
+        counts["calls"] += 1
+        counts["deduplicated"] += deduplicated
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) unless a call for `key` is already running,
+        in which case wait for it. Every waiter gets the same result object,
+        so treat it as read-only (copy before changing it).
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            self._count(key, not leader)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per operation: calls made and how many of them joined a call already in flight."""
+        with self._lock:
+            return {op: dict(counts) for op, counts in self._counts.items()}
+
+
+# Shared by every upstream fetch in the process
+single_flight = SingleFlight()
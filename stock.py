@@ -1,11 +1,47 @@
+import argparse
+import asyncio
+import heapq
+import json
+import os
+import threading
+import zlib
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
-import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from journal import ChangeLog, IngestJournal, changes_path, iter_journal, journal_path, prune_journals
+from market_data import get_provider
+from normalize import iter_normalized
+from rate_limit import AdaptiveLimiter, RetryQueue, backoff_delay, is_throttled
+from response_cache import ResponseCache, conditional_headers
+from singleflight import single_flight
+from summary_store import get_store
 
 # Input and output CSV files
 INPUT_FILE = "tickers.csv"
 OUTPUT_FILE = "nasdaq_summary.csv"
 
+# Default ingest settings: one worker at 2 req/s matches the old 0.5 s sleep
+DEFAULT_WORKERS = 1
+DEFAULT_RATE = 2.0
+# Tries per symbol before a throttled symbol is given up on
+MAX_ATTEMPTS = 5
+
+# Base URL of the Nasdaq API; point it at mock_nasdaq_api.py to run offline
+NASDAQ_API_BASE = os.environ.get("NASDAQ_API_BASE", "https://api.nasdaq.com").rstrip("/")
+
+# Keep-alive connections held open to the API host
+POOL_SIZE = 16
+
+# Persistent summary response cache: entries are served without a network
+# call for SUMMARY_CACHE_TTL seconds, then revalidated with ETag/Last-Modified
+SUMMARY_CACHE_FILE = os.environ.get("SUMMARY_CACHE_FILE", "nasdaq_cache.db")
+SUMMARY_CACHE_TTL = float(os.environ.get("SUMMARY_CACHE_TTL", 300))
+SUMMARY_CACHE_MAX = int(os.environ.get("SUMMARY_CACHE_MAX", 20000))
+
+# Starting req/s of the limiter shared by one-off lookups (e.g. the web viewer)
+LOOKUP_RATE = float(os.environ.get("SUMMARY_LOOKUP_RATE", DEFAULT_RATE))
+
 # Headers required by Nasdaq API (otherwise you'll often get blocked)
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
@@ -14,52 +50,394 @@ HEADERS = {
     "Referer": "https://www.nasdaq.com/",
 }
 
-def fetch_summary(symbol: str):
+_session = None
+_session_lock = threading.Lock()
+_cache = None
+_lookup_limiter = None
+
+
+def get_session() -> requests.Session:
+    """
+    Return the shared keep-alive session used for all Nasdaq API calls.
+    The connection pool is sized to POOL_SIZE so concurrent workers
+    reuse open TCP/TLS connections instead of handshaking per symbol.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                session.headers.update(HEADERS)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def get_cache() -> ResponseCache:
+    """Return the shared summary response cache (created on first use)."""
+    global _cache
+    if _cache is None:
+        with _session_lock:
+            if _cache is None:
+                _cache = ResponseCache(SUMMARY_CACHE_FILE, ttl=SUMMARY_CACHE_TTL, max_entries=SUMMARY_CACHE_MAX)
+    return _cache
+
+
+def get_lookup_limiter() -> AdaptiveLimiter:
+    """
+    Return the AIMD limiter shared by every single-symbol lookup in the
+    process, so concurrent lookups back off together when throttled.
+    """
+    global _lookup_limiter
+    if _lookup_limiter is None:
+        with _session_lock:
+            if _lookup_limiter is None:
+                _lookup_limiter = make_limiter(workers=POOL_SIZE, rate=LOOKUP_RATE)
+    return _lookup_limiter
+
+
+def summary_url(symbol: str) -> str:
+    return f"{NASDAQ_API_BASE}/api/quote/{symbol}/summary?assetclass=stocks"
+
+
+def parse_summary(symbol: str, payload: dict):
+    """Flatten the summaryData block of an API response into a row dict."""
+    data = payload.get("data") or {}
+    summary = data.get("summaryData") or {}
+
+    # Flatten useful fields
+    row = {"Symbol": symbol}
+    for key, value in summary.items():
+        row[key] = value.get("value") if isinstance(value, dict) else value
+
+    return row
+
+
+def fetch_summary_status(symbol: str, use_cache: bool = True, limiter: AdaptiveLimiter = None):
     """
     Fetch summary data for a stock symbol from Nasdaq API.
-    Returns a dict of useful fields or None if error.
+    Fresh cached rows are returned without a request; stale ones are
+    revalidated. `limiter` is only acquired when a request is sent and
+    is told the outcome, so it can back off on throttling.
+    Returns (status, row): status is the HTTP status (200 for cache hits
+    and revalidated entries) or None if no response was received; row is
+    a dict of useful fields or None if error.
     """
-    url = f"https://api.nasdaq.com/api/quote/{symbol}/summary?assetclass=stocks"
+    status = None
+    acquired = False
     try:
-        resp = requests.get(url, headers=HEADERS, timeout=10)
-        if resp.status_code != 200:
-            print(f"[{symbol}] HTTP {resp.status_code}")
-            return None
+        cache = get_cache() if use_cache else None
+        entry = cache.get(symbol) if cache else None
+        if entry and cache.is_fresh(entry):
+            return 200, entry.value
+        if limiter:
+            limiter.acquire()
+            acquired = True
+        resp = get_session().get(summary_url(symbol), headers=conditional_headers(entry), timeout=10)
+        status = resp.status_code
+        if status == 304 and entry:
+            cache.touch(symbol)
+            return 200, entry.value
+        if status != 200:
+            print(f"[{symbol}] HTTP {status}")
+            return status, None
+        row = parse_summary(symbol, resp.json())
+        if cache:
+            cache.put(symbol, row, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+        return status, row
+    except Exception as e:
+        print(f"[{symbol}] Error: {e}")
+        return status, None
+    finally:
+        if acquired:
+            limiter.release(status)
 
-        data = resp.json().get("data", {})
-        summary = data.get("summaryData", {})
 
-        # Flatten useful fields
-        row = {"Symbol": symbol}
-        for key, value in summary.items():
-            row[key] = value.get("value") if isinstance(value, dict) else value
+def fetch_summary(symbol: str, use_cache: bool = True):
+    """
+    Fetch summary data for a stock symbol from the configured market data
+    provider (the Nasdaq API unless MARKET_DATA_PROVIDER says otherwise).
+    Returns a dict of useful fields or None if error.
+    Concurrent calls for the same symbol share one upstream request.
+    """
+    row = single_flight.do(("summary", symbol), get_provider().lookup_summary, symbol, use_cache=use_cache)
+    return dict(row) if row else None
+
+
+def make_limiter(workers: int = DEFAULT_WORKERS, rate: float = DEFAULT_RATE, max_rate: float = None, burst: float = 1.0) -> AdaptiveLimiter:
+    """
+    AIMD limiter for bulk ingestion: starts at `rate` req/s and one request
+    in flight, probes up to `max_rate` and `workers` while upstream is
+    healthy, and halves both on 429/403/5xx.
+    """
+    return AdaptiveLimiter(rate, max_rate=max_rate, max_concurrency=workers, burst=burst)
+
 
-        return row
+async def fetch_summary_status_async(session, symbol: str, cache: ResponseCache = None, limiter: AdaptiveLimiter = None):
+    """asyncio counterpart of fetch_summary_status() over an aiohttp session."""
+    status = None
+    acquired = False
+    try:
+        entry = cache.get(symbol) if cache else None
+        if entry and cache.is_fresh(entry):
+            return 200, entry.value
+        if limiter:
+            await limiter.acquire_async()
+            acquired = True
+        async with session.get(summary_url(symbol), headers=conditional_headers(entry)) as resp:
+            status = resp.status
+            if status == 304 and entry:
+                cache.touch(symbol)
+                return 200, entry.value
+            if status != 200:
+                print(f"[{symbol}] HTTP {status}")
+                return status, None
+            row = parse_summary(symbol, await resp.json(content_type=None))
+            if cache:
+                cache.put(symbol, row, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+            return status, row
     except Exception as e:
         print(f"[{symbol}] Error: {e}")
-        return None
+        return status, None
+    finally:
+        if acquired:
+            limiter.release(status)
+
+
+async def fetch_summaries_async(symbols, concurrency: int = POOL_SIZE, rate: float = None, burst: float = 1.0,
+                                on_row=None, use_cache: bool = True, max_rate: float = None, max_attempts: int = MAX_ATTEMPTS):
+    """
+    Fetch summaries for many symbols on one asyncio event loop.
+    `concurrency` worker tasks pull symbols from a queue and pipeline their
+    requests over as many pooled keep-alive connections (requires aiohttp).
+    If `rate` is given, requests go through an AIMD limiter that starts at
+    `rate` req/s and adapts up to `max_rate`. Throttled symbols are put
+    back on the queue after a jittered backoff.
+    Returns the successful rows in input order; if `on_row` is given each
+    row is handed to it as soon as it arrives instead of being kept.
+    """
+    import aiohttp
+
+    symbols = list(symbols)
+    limiter = make_limiter(concurrency, rate, max_rate, burst) if rate else None
+    cache = get_cache() if use_cache else None
+    connector = aiohttp.TCPConnector(limit=max(1, concurrency))
+    timeout = aiohttp.ClientTimeout(total=10)
+    loop = asyncio.get_running_loop()
+    work = asyncio.Queue()
+    for symbol in symbols:
+        work.put_nowait((symbol, 0))
+    results = {}
+
+    def requeue(task):
+        work.put_nowait(task)
+        work.task_done()
+
+    async def worker(session):
+        while True:
+            symbol, attempt = await work.get()
+            status, row = await fetch_summary_status_async(session, symbol, cache, limiter)
+            if row is None and is_throttled(status) and attempt + 1 < max_attempts:
+                # Stays unfinished until it is back on the queue, so join() waits for it
+                loop.call_later(backoff_delay(attempt), requeue, (symbol, attempt + 1))
+                continue
+            if row and on_row:
+                on_row(row)
+            elif row:
+                results[symbol] = row
+            work.task_done()
+
+    async with aiohttp.ClientSession(headers=HEADERS, connector=connector, timeout=timeout) as session:
+        workers = [asyncio.create_task(worker(session)) for _ in range(max(1, concurrency))]
+        drained = asyncio.create_task(work.join())
+        try:
+            # A worker only finishes early by raising (e.g. from on_row); surface that
+            done, _ = await asyncio.wait([drained, *workers], return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        finally:
+            for task in [drained, *workers]:
+                task.cancel()
+            await asyncio.gather(drained, *workers, return_exceptions=True)
+    return [results[s] for s in symbols if s in results]
 
 
-def main():
+def fetch_all(symbols, workers: int = DEFAULT_WORKERS, rate: float = DEFAULT_RATE, burst: float = 1.0,
+              on_row=None, max_rate: float = None, max_attempts: int = MAX_ATTEMPTS, use_cache: bool = True):
+    """
+    Fetch summaries for many symbols with a bounded worker pool.
+    Requests share one AIMD limiter, so the aggregate rate starts at `rate`
+    requests/sec, probes up towards `max_rate` while upstream is healthy
+    and backs off on 429/403/5xx. Throttled symbols go back on a retry
+    queue with jittered backoff, up to `max_attempts` tries each.
+    Returns the successful rows in input order; if `on_row` is given each
+    row is handed to it (from the worker thread) as soon as it arrives
+    instead of being kept.
+    """
+    symbols = list(symbols)
+    limiter = make_limiter(workers, rate, max_rate, burst)
+    work = RetryQueue(symbols, max_attempts=max_attempts)
+    results = {}
+    failed = []
+
+    def worker():
+        while True:
+            task = work.get()
+            if task is None:
+                return
+            symbol, attempt = task
+            print(f"Fetching {symbol} ..." if not attempt else f"Retrying {symbol} (attempt {attempt + 1}) ...")
+            status, row = fetch_summary_status(symbol, use_cache, limiter)
+            retry = row is None and is_throttled(status)
+            if not work.done(symbol, attempt, retry=retry) and row is None:
+                failed.append(symbol)
+            if row and on_row:
+                on_row(row)
+            elif row:
+                results[symbol] = row
+
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        for future in [pool.submit(worker) for _ in range(max(1, workers))]:
+            future.result()
+    except BaseException:
+        # Ctrl+C: stop handing out symbols instead of draining the whole list
+        work.close()
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+    if limiter.throttled:
+        print(f"Upstream throttled {limiter.throttled} requests; final rate {limiter.rate:.2f} req/s, concurrency {limiter.limit}")
+    if failed:
+        print(f"{len(failed)} symbols failed: {', '.join(map(str, failed[:20]))}{' ...' if len(failed) > 20 else ''}")
+    return [results[s] for s in symbols if s in results]
+
+
+def ingest_symbols(symbols, path: str, workers: int = DEFAULT_WORKERS, rate: float = DEFAULT_RATE, burst: float = 1.0,
+                   use_async: bool = False, resume: bool = True, max_rate: float = None):
+    """
+    Fetch `symbols` from the market data provider into the journal at
+    `path`. Rows are journaled as they arrive, and symbols already in the
+    journal are skipped (the journal doubles as the checkpoint) unless
+    `resume` is False.
+    """
+    if not resume and os.path.exists(path):
+        os.remove(path)
+    with IngestJournal(path) as journal:
+        todo = [s for s in symbols if s not in journal.done]
+        skipped = len(symbols) - len(todo)
+        if skipped:
+            print(f"Resuming: {skipped} symbols already fetched today ({path})")
+        get_provider().get_summary(todo, on_row=journal.append, use_async=use_async, workers=workers, rate=rate,
+                                   burst=burst, max_rate=max_rate)
+
+
+def shard_symbols(symbols, shards: int, by: str = "hash"):
+    """
+    Split symbols into `shards` lists of (input position, symbol).
+    "hash" spreads symbols by CRC32 (stable across runs and processes);
+    "range" gives each shard a contiguous slice of the input.
+    """
+    parts = [[] for _ in range(shards)]
+    for pos, symbol in enumerate(symbols):
+        if by == "hash":
+            index = zlib.crc32(str(symbol).encode("utf-8")) % shards
+        else:
+            index = pos * shards // len(symbols)
+        parts[index].append((pos, symbol))
+    return parts
+
+
+def ingest_shard(shard: int, positions, options: dict) -> str:
+    """
+    Shard worker process: ingest its symbols into its own journal, then
+    write its partial output, normalized and sorted by input position.
+    Rows are normalized chunk by chunk into a scratch file and only their
+    (position, offset) pairs are sorted, so memory stays flat.
+    Returns the partial output path.
+    """
+    path = journal_path(OUTPUT_FILE, part=shard)
+    ingest_symbols([s for _, s in positions], path, **options)
+    order = {s: pos for pos, s in positions}
+    out_path = path[:-len(".jsonl")] + ".out.jsonl"
+    index = []
+    with open(out_path + ".unsorted", "w+b") as scratch:
+        for row in iter_normalized(iter_journal(path), keep_empty=True):
+            pos = order.get(row["Symbol"])
+            if pos is not None:
+                index.append((pos, scratch.tell()))
+                scratch.write(json.dumps(dict(row, _pos=pos), ensure_ascii=False).encode("utf-8") + b"\n")
+        index.sort()
+        with open(out_path + ".tmp", "wb") as f:
+            for _, offset in index:
+                scratch.seek(offset)
+                f.write(scratch.readline())
+    os.remove(out_path + ".unsorted")
+    os.replace(out_path + ".tmp", out_path)
+    return out_path
+
+
+def merge_shards(part_paths):
+    """Stream the partial outputs back together in input order (k-way merge)."""
+    for row in heapq.merge(*(iter_journal(p) for p in part_paths), key=lambda r: r["_pos"]):
+        row.pop("_pos")
+        yield row
+
+
+def main(workers: int = DEFAULT_WORKERS, rate: float = DEFAULT_RATE, burst: float = 1.0, use_async: bool = False,
+         resume: bool = True, max_rate: float = None, shards: int = 1, shard_by: str = "hash"):
     # Read tickers from CSV
     tickers_df = pd.read_csv(INPUT_FILE)
+    symbols = tickers_df["Symbol"].tolist()
+
+    # Earlier days' journals are stale checkpoints; a full-universe one is written every day
+    removed = prune_journals(OUTPUT_FILE)
+    if removed:
+        print(f"Removed {len(removed)} journal files from earlier days")
+
+    if shards > 1:
+        # One process per shard; the rate budget is split evenly between them
+        options = dict(workers=workers, rate=rate / shards, burst=burst, use_async=use_async, resume=resume,
+                       max_rate=max_rate / shards if max_rate else None)
+        with ProcessPoolExecutor(max_workers=shards) as pool:
+            futures = [pool.submit(ingest_shard, i, part, options)
+                       for i, part in enumerate(shard_symbols(symbols, shards, shard_by))]
+            part_paths = [f.result() for f in futures]
+        rows = merge_shards(part_paths)
+    else:
+        path = journal_path(OUTPUT_FILE)
+        ingest_symbols(symbols, path, workers=workers, rate=rate, burst=burst, use_async=use_async,
+                       resume=resume, max_rate=max_rate)
+        # Keep fields that went to "N/A" as None so the delta upsert removes them
+        rows = iter_normalized(iter_journal(path), keep_empty=True)
 
-    results = []
-    for symbol in tickers_df["Symbol"]:
-        print(f"Fetching {symbol} ...")
-        row = fetch_summary(symbol)
-        if row:
-            results.append(row)
-        time.sleep(0.5)  # polite delay to avoid rate limits
-
-    # Convert to DataFrame and save
-    if results:
-        out_df = pd.DataFrame(results)
-        out_df.to_csv(OUTPUT_FILE, index=False)
-        print(f"\n✅ Saved {len(out_df)} rows to {OUTPUT_FILE}")
+    # Persist only the rows whose normalized values changed, logging each
+    # changed field, then refresh the CSV snapshot for tools that still read it
+    store = get_store()
+    with ChangeLog(changes_path(OUTPUT_FILE)) as changes:
+        changed, unchanged = store.upsert_changed(rows, on_change=changes.write)
+    if changed:
+        store.export_csv(OUTPUT_FILE)
+        print(f"\n✅ Saved {changed} changed rows ({changes.count} fields, {unchanged} unchanged) "
+              f"to {store.path} and {OUTPUT_FILE}; changes in {changes.path}")
+    elif unchanged:
+        print(f"\n✅ No changes in {unchanged} rows.")
     else:
         print("\n⚠️ No data fetched.")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Fetch Nasdaq summary data for every symbol in tickers.csv")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"Max concurrent fetch workers (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help=f"Starting requests per second across all workers (default: {DEFAULT_RATE})")
+    parser.add_argument("--max-rate", type=float, default=None, dest="max_rate", help="Ceiling the adaptive limiter may probe up to (default: --rate)")
+    parser.add_argument("--burst", type=float, default=1.0, help="Token bucket capacity (default: 1)")
+    parser.add_argument("--async", action="store_true", dest="use_async", help="Use the asyncio client; --workers sets the connection limit")
+    parser.add_argument("--fresh", action="store_false", dest="resume", help="Ignore today's checkpoint and refetch every symbol")
+    parser.add_argument("--shards", type=int, default=1, help="Worker processes to split tickers.csv across (default: 1)")
+    parser.add_argument("--shard-by", choices=["hash", "range"], default="hash", dest="shard_by", help="How symbols are assigned to shards (default: hash)")
+    args = parser.parse_args()
+    main(workers=args.workers, rate=args.rate, burst=args.burst, use_async=args.use_async, resume=args.resume,
+         max_rate=args.max_rate, shards=args.shards, shard_by=args.shard_by)
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+SQLite-backed summary table keyed by Symbol.
+
+Replaces the read-modify-write of nasdaq_summary.csv: each row is a JSON
+document under a PRIMARY KEY on symbol, so point lookups and single-row
+upserts never scan or rewrite the table. The database runs in WAL mode,
+so the viewer can read while an ingest is writing.
+
+    python summary_store.py import nasdaq_summary.csv
+    python summary_store.py export nasdaq_summary.csv
+"""
+import argparse
+import atexit
+import csv
+import hashlib
+import json
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from normalize import column_order, format_field, iter_normalized
+
+STORE_FILE = os.environ.get(
+    "SUMMARY_STORE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "nasdaq_summary.db")
+)
+
+
+def _is_empty(value) -> bool:
+    return value is None or value == "" or (isinstance(value, float) and math.isnan(value))
+
+
+def _clean(fields: Dict) -> Dict:
+    """Drop empty values so an upsert never blanks out a stored field."""
+    return {k: v for k, v in fields.items() if not _is_empty(v)}
+
+
+def _digest(row: Dict) -> str:
+    return hashlib.blake2b(json.dumps(row, sort_keys=True).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class TableSnapshot:
+    """
+    The whole summary table as of one store version: rows indexed by
+    symbol, the ticker list in insertion order, and a DataFrame built on
+    first use. Shared between threads, so treat it as read-only.
+    """
+
+    def __init__(self, version: int, rows: Dict[str, Dict], columns: List[str]):
+        self.version = version
+        self.rows = rows
+        self.tickers = list(rows)
+        self.columns = columns
+        self._frame = None
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        if self._frame is None:
+            self._frame = pd.DataFrame(list(self.rows.values()), columns=self.columns)
+        return self._frame
+
+
+class SummaryStore:
+    """
+    Summary rows stored one JSON document per symbol. Upserts merge the
+    given fields into the stored row; columns() lists every field seen in
+    the canonical normalize.column_order(). Each thread gets its own
+    connection.
+    """
+
+    def __init__(self, path: str = STORE_FILE):
+        self.path = path
+        self._local = threading.local()
+        self._known_columns = set()
+        self._snapshot = None
+        self._snapshot_lock = threading.Lock()
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS summary (symbol TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS columns (name TEXT PRIMARY KEY, position INTEGER NOT NULL)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS digests (symbol TEXT NOT NULL, source TEXT NOT NULL, hash TEXT NOT NULL,"
+            " PRIMARY KEY (symbol, source)) WITHOUT ROWID"
+        )
+        # Bumped by every write transaction, in any process; snapshot() reloads when it moves
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        conn.execute("INSERT OR IGNORE INTO columns (name, position) VALUES ('Symbol', 0)")
+        conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _register_columns(self, conn: sqlite3.Connection, names: Iterable[str], seen: set):
+        for name in names:
+            if name not in self._known_columns and name not in seen:
+                conn.execute(
+                    "INSERT OR IGNORE INTO columns (name, position) VALUES (?, (SELECT COUNT(*) FROM columns))",
+                    (name,),
+                )
+                seen.add(name)
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection):
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    def version(self) -> int:
+        return self._conn().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        """Point lookup by symbol; returns the row dict or None."""
+        row = self._conn().execute("SELECT data FROM summary WHERE symbol = ?", (symbol,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def upsert(self, symbol: str, fields: Dict):
+        """Insert the symbol or merge `fields` into its stored row."""
+        self.upsert_many([dict(fields, Symbol=symbol)])
+
+    def upsert_many(self, rows: Iterable[Dict]) -> int:
+        """Upsert many rows (each carrying a Symbol) in one transaction."""
+        conn = self._conn()
+        count = 0
+        seen = set()
+        with conn:
+            for row in rows:
+                data = _clean(row)
+                self._register_columns(conn, data, seen)
+                conn.execute(
+                    "INSERT INTO summary (symbol, data) VALUES (?, ?)"
+                    " ON CONFLICT(symbol) DO UPDATE SET data = json_patch(data, excluded.data)",
+                    (str(data["Symbol"]), json.dumps(data)),
+                )
+                count += 1
+            if count:
+                self._bump(conn)
+        self._known_columns.update(seen)
+        return count
+
+    def upsert_changed(self, rows: Iterable[Dict], source: str = "summary", on_change=None) -> Tuple[int, int]:
+        """
+        Delta-only upsert. Each row's digest is compared with the digest last
+        stored for (symbol, source); unchanged rows cost one index lookup and
+        no write. For changed rows only the fields whose values differ are
+        patched, and on_change(symbol, field, old, new) is called for each.
+        Rows are full upstream snapshots, so an empty value (None, "", NaN)
+        is a real change: a stored value it replaces is removed from the
+        row and reported with new=None.
+        Returns (changed rows, unchanged rows).
+        """
+        conn = self._conn()
+        changed = unchanged = 0
+        seen = set()
+        with conn:
+            for row in rows:
+                # None survives json_patch as "remove this field"
+                data = {k: None if _is_empty(v) else v for k, v in row.items()}
+                symbol = str(data["Symbol"])
+                # Empty fields are left out, so the digest does not depend on
+                # which columns the other rows of a normalized chunk had
+                digest = _digest(_clean(data))
+                stored_digest = conn.execute(
+                    "SELECT hash FROM digests WHERE symbol = ? AND source = ?", (symbol, source)
+                ).fetchone()
+                if stored_digest and stored_digest[0] == digest:
+                    unchanged += 1
+                    continue
+                stored = conn.execute("SELECT data FROM summary WHERE symbol = ?", (symbol,)).fetchone()
+                old = json.loads(stored[0]) if stored else {}
+                delta = {k: v for k, v in data.items() if k != "Symbol" and old.get(k) != v}
+                if delta or not stored:
+                    self._register_columns(conn, _clean(data), seen)
+                    if stored:
+                        conn.execute(
+                            "UPDATE summary SET data = json_patch(data, ?) WHERE symbol = ?",
+                            (json.dumps(delta), symbol),
+                        )
+                    else:
+                        conn.execute(
+                            "INSERT INTO summary (symbol, data) VALUES (?, ?)",
+                            (symbol, json.dumps(_clean(dict(data, Symbol=symbol)))),
+                        )
+                    if on_change:
+                        for k, v in delta.items():
+                            on_change(symbol, k, old.get(k), v)
+                    changed += 1
+                else:
+                    unchanged += 1
+                conn.execute(
+                    "INSERT OR REPLACE INTO digests (symbol, source, hash) VALUES (?, ?, ?)", (symbol, source, digest)
+                )
+            if changed:
+                self._bump(conn)
+        self._known_columns.update(seen)
+        return changed, unchanged
+
+    def symbols(self) -> List[str]:
+        return [r[0] for r in self._conn().execute("SELECT symbol FROM summary ORDER BY rowid")]
+
+    def columns(self) -> List[str]:
+        return column_order(r[0] for r in self._conn().execute("SELECT name FROM columns"))
+
+    def iter_rows(self) -> Iterable[Dict]:
+        for (data,) in self._conn().execute("SELECT data FROM summary ORDER BY rowid"):
+            yield json.loads(data)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(list(self.iter_rows()), columns=self.columns())
+
+    def snapshot(self) -> TableSnapshot:
+        """
+        Process-wide cached copy of the table. Costs one version query
+        while nothing has been written; a write anywhere triggers one reload.
+        """
+        with self._snapshot_lock:
+            if self._snapshot is None or self._snapshot.version != self.version():
+                conn = self._conn()
+                # One read transaction, so the version matches the rows read
+                conn.execute("BEGIN")
+                try:
+                    version = self.version()
+                    rows = {}
+                    for symbol, data in conn.execute("SELECT symbol, data FROM summary ORDER BY rowid"):
+                        rows[symbol] = json.loads(data)
+                    columns = self.columns()
+                finally:
+                    conn.commit()
+                self._snapshot = TableSnapshot(version, rows, columns)
+            return self._snapshot
+
+    def import_csv(self, path: str) -> int:
+        """One-shot import of an existing nasdaq_summary.csv, normalized on the way in."""
+        with open(path, "r", newline="", encoding="utf-8") as f:
+            return self.upsert_many(iter_normalized(r for r in csv.DictReader(f) if r.get("Symbol")))
+
+    def import_csv_if_empty(self, path: str) -> int:
+        """Seed a brand-new store from the legacy CSV, if there is one."""
+        if os.path.exists(path) and self._conn().execute("SELECT 1 FROM summary LIMIT 1").fetchone() is None:
+            return self.import_csv(path)
+        return 0
+
+    def export_csv(self, path: str, formatted: bool = True) -> int:
+        """
+        Write the whole table as a CSV (for tools that still read one).
+        Values are rendered for display with format_field ("$1,234.56",
+        rounded to cents) unless `formatted` is False; import_csv parses
+        either form back.
+        """
+        tmp_path = path + ".tmp"
+        count = 0
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=self.columns())
+            writer.writeheader()
+            for row in self.iter_rows():
+                writer.writerow({k: format_field(k, v) for k, v in row.items()} if formatted else row)
+                count += 1
+        os.replace(tmp_path, path)
+        return count
+
+
+class StoreWriter:
+    """
+    Single writer thread that owns all incremental writes to a store.
+    upsert() only enqueues and returns immediately. The writer coalesces
+    updates per symbol and commits them as one upsert_many() batch when
+    `max_batch` symbols are pending or the oldest pending update is
+    `max_delay` seconds old. Failed batches are kept and retried, and
+    close() (also run at exit) drains the queue. While closing, a batch
+    that still fails after `stop_retries` attempts is reported and dropped,
+    so a broken database cannot hang the process at exit.
+    get() overlays not-yet-committed fields, so callers read their own writes.
+    """
+
+    _STOP = object()
+
+    def __init__(self, store: SummaryStore, max_batch: int = 500, max_delay: float = 0.5, stop_retries: int = 5):
+        self.store = store
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.stop_retries = stop_retries
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._unflushed = {}  # symbol -> (seq, merged fields) not yet committed
+        self._thread = threading.Thread(target=self._run, name="store-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close, 30.0)
+
+    def upsert(self, symbol: str, fields: Dict):
+        """Queue a merge of `fields` into the symbol's row."""
+        with self._lock:
+            self._seq += 1
+            _, pending = self._unflushed.get(symbol, (0, {}))
+            self._unflushed[symbol] = (self._seq, dict(pending, **fields))
+            self._queue.put((symbol, dict(fields), self._seq))
+
+    def pending(self, symbol: str) -> Optional[Dict]:
+        """Queued fields for `symbol` that are not committed yet, or None."""
+        with self._lock:
+            pending = self._unflushed.get(symbol)
+        return dict(pending[1]) if pending else None
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        """Stored row with any queued fields applied on top."""
+        row = self.store.get(symbol)
+        pending = self.pending(symbol)
+        if pending is None:
+            return row
+        return dict(row or {"Symbol": symbol}, **pending)
+
+    def pending_symbols(self) -> List[str]:
+        """Symbols with queued writes that are not in the store yet."""
+        with self._lock:
+            return list(self._unflushed)
+
+    def flush(self, timeout: float = None) -> bool:
+        """Block until everything queued so far is committed."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: float = None) -> bool:
+        """Drain the queue and stop the writer; False if it was still busy after `timeout` seconds."""
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _run(self):
+        batch = {}  # symbol -> [merged fields, last seq]
+        deadline = None
+        waiters = []
+        stopping = False
+        stop_failures = 0
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is self._STOP:
+                stopping = True
+            elif isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not None:
+                symbol, fields, seq = item
+                entry = batch.setdefault(symbol, [{}, 0])
+                entry[0].update(fields)
+                entry[1] = seq
+                if deadline is None:
+                    deadline = time.monotonic() + self.max_delay
+            due = stopping or waiters or len(batch) >= self.max_batch or (batch and time.monotonic() >= deadline)
+            if batch and due:
+                if not self._commit(batch):
+                    if not stopping:
+                        deadline = time.monotonic() + 1.0
+                        continue
+                    stop_failures += 1
+                    if stop_failures < self.stop_retries:
+                        continue
+                    print(f"Store writer: dropping {len(batch)} symbols after {stop_failures} failed attempts "
+                          f"while closing: {', '.join(sorted(batch)[:10])}{' ...' if len(batch) > 10 else ''}")
+                    with self._lock:
+                        for symbol, (_, seq) in batch.items():
+                            current = self._unflushed.get(symbol)
+                            if current and current[0] <= seq:
+                                del self._unflushed[symbol]
+                batch, deadline = {}, None
+            for waiter in waiters:
+                waiter.set()
+            waiters = []
+            if stopping and self._queue.empty():
+                return
+
+    def _commit(self, batch) -> bool:
+        try:
+            self.store.upsert_many(dict(fields, Symbol=symbol) for symbol, (fields, _) in batch.items())
+        except Exception as e:
+            print(f"Store writer: batch of {len(batch)} failed, retrying: {e}")
+            time.sleep(0.2)
+            return False
+        with self._lock:
+            for symbol, (_, seq) in batch.items():
+                current = self._unflushed.get(symbol)
+                if current and current[0] <= seq:
+                    del self._unflushed[symbol]
+        return True
+
+
+_store = None
+_writer = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> SummaryStore:
+    """Return the process-wide store at STORE_FILE."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SummaryStore(STORE_FILE)
+    return _store
+
+
+def get_writer() -> StoreWriter:
+    """Return the process-wide write-behind writer for get_store()."""
+    global _writer
+    store = get_store()
+    if _writer is None:
+        with _store_lock:
+            if _writer is None:
+                _writer = StoreWriter(store)
+    return _writer
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import/export the Nasdaq summary store")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("csv_path", nargs="?", default="nasdaq_summary.csv", help="CSV file (default: nasdaq_summary.csv)")
+    parser.add_argument("--db", default=STORE_FILE, help=f"Store file (default: {STORE_FILE})")
+    parser.add_argument("--raw", action="store_false", dest="formatted", help="Export plain numbers instead of display strings")
+    args = parser.parse_args()
+
+    store = SummaryStore(args.db)
+    if args.action == "import":
+        print(f"Imported {store.import_csv(args.csv_path)} rows into {args.db}")
+    else:
+        print(f"Exported {store.export_csv(args.csv_path, formatted=args.formatted)} rows to {args.csv_path}")
@@ -0,0 +1,122 @@
+"""
+NYSE/Nasdaq regular-session calendar, computed from the exchange holiday rules.
+
+Used to decide which session a quote belongs to and whether that session
+can still change: weekends and holidays resolve to the last session, and
+a session is final once its close has passed.
+"""
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import FrozenSet
+from zoneinfo import ZoneInfo
+
+EXCHANGE_TZ = ZoneInfo("America/New_York")
+SESSION_OPEN = time(9, 30)
+SESSION_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-th (1-based) weekday of a month; n=-1 for the last one."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day: date) -> date:
+    """Saturday holidays are observed on Friday, Sunday holidays on Monday."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+@lru_cache(maxsize=None)
+def holidays(year: int) -> FrozenSet[date]:
+    days = {
+        _nth_weekday(year, 1, 0, 3),    # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),    # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),   # Memorial Day
+        _observed(date(year, 7, 4)),    # Independence Day
+        _nth_weekday(year, 9, 0, 1),    # Labor Day
+        _nth_weekday(year, 11, 3, 4),   # Thanksgiving
+        _observed(date(year, 12, 25)),  # Christmas
+    }
+    # New Year's Day: a Saturday holiday is not moved back into December
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days.add(_observed(new_year))
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))  # Juneteenth
+    return frozenset(days)
+
+
+def is_trading_day(day: date) -> bool:
+    return day.weekday() < 5 and day not in holidays(day.year)
+
+
+def close_time(day: date) -> time:
+    """Regular close; 1 pm on July 3, the day after Thanksgiving and Christmas Eve."""
+    early = {
+        _nth_weekday(day.year, 11, 3, 4) + timedelta(days=1),
+        date(day.year, 12, 24),
+        date(day.year, 7, 3),
+    }
+    return EARLY_CLOSE if day in early else SESSION_CLOSE
+
+
+def previous_session(day: date) -> date:
+    """Last trading day strictly before `day`."""
+    day -= timedelta(days=1)
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+    return day
+
+
+def exchange_now() -> datetime:
+    return datetime.now(EXCHANGE_TZ)
+
+
+def current_session(now: datetime = None) -> date:
+    """
+    Session the latest daily bar belongs to: today once the session has
+    opened, otherwise the last trading day before it.
+    """
+    now = (now or exchange_now()).astimezone(EXCHANGE_TZ)
+    today = now.date()
+    if is_trading_day(today) and now.time() >= SESSION_OPEN:
+        return today
+    return previous_session(today)
+
+
+def is_session_closed(day: date, now: datetime = None) -> bool:
+    """True once the session on `day` is over, so its bar can no longer change."""
+    now = (now or exchange_now()).astimezone(EXCHANGE_TZ)
+    if day != now.date():
+        return day < now.date()
+    return not is_trading_day(day) or now.time() >= close_time(day)
+
+
+def settled_through(now: datetime = None) -> date:
+    """Latest calendar date whose daily bar (if any) is final."""
+    now = (now or exchange_now()).astimezone(EXCHANGE_TZ)
+    today = now.date()
+    return today if is_session_closed(today, now) else today - timedelta(days=1)